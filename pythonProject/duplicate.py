@@ -1,6 +1,14 @@
 from pymongo import MongoClient
 from collections import defaultdict
 import os
+import sys
+
+# URL kanonikleştirme kuralları spider ile ortaktır
+SPIDER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "spider")
+sys.path.insert(0, SPIDER_DIR)
+from canonical import UrlCanonicalizer
+
+canonicalizer = UrlCanonicalizer.from_config(os.path.join(SPIDER_DIR, "config", "canonical_rules.json"))
 
 # Ortam değişkenleri veya doğrudan değerler
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
@@ -12,13 +20,13 @@ client = MongoClient(MONGO_URI)
 db = client[MONGO_DB_NAME]
 collection = db[PROCESSED_SITES_SEO]
 
-# Aynı URL'ye sahip dokümanları bul
+# Aynı (kanonik) URL'ye sahip dokümanları bul
 url_to_ids = defaultdict(list)
 
 for doc in collection.find({}, {"_id": 1, "url": 1}):
     url = doc.get("url")
     if url:
-        url_to_ids[url].append(doc["_id"])
+        url_to_ids[canonicalizer.canonicalize(url) or url].append(doc["_id"])
 
 # Aynı URL'ye sahip fazladan olanları sil
 duplicate_count = 0
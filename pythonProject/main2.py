@@ -1,4 +1,5 @@
 import os
+import hashlib
 import unicodedata
 import requests
 import random
@@ -405,10 +406,50 @@ def tag_website(_id, url, use_playwright=False):
         "external_backlinks": external_backlinks
     }
 
+def check_unchanged(url, record):
+    """
+    Spider'ın kaydettiği ETag / Last-Modified / içerik özetiyle koşullu istek atar.
+    Sayfa değişmediyse True ve güncel doğrulayıcıları döner; karar verilemezse False.
+    """
+    validators = {key: record.get(key) for key in ("etag", "last_modified", "content_hash")}
+    if not any(validators.values()):
+        return False, validators
+    headers = {'User-Agent': random.choice(USER_AGENTS)}
+    if validators["etag"]:
+        headers['If-None-Match'] = validators["etag"]
+    if validators["last_modified"]:
+        headers['If-Modified-Since'] = validators["last_modified"]
+    try:
+        response = requests.get(ensure_url_scheme(url), headers=headers, timeout=15, verify=False)
+    except requests.RequestException:
+        return False, validators
+    if response.status_code == 304:
+        return True, validators
+    if response.status_code != 200:
+        return False, validators
+    fresh = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_hash": hashlib.blake2b(response.content, digest_size=16).hexdigest(),
+    }
+    return fresh["content_hash"] == validators["content_hash"], fresh
+
+
 def process_with_delay(args, use_playwright=False):
-    _id, url = args
+    _id, url, record = args
+    if record.get("last_processed_time") is None:
+        # İlk etiketleme: doğrulayıcılar spider'ın kendi indirmesinden, karşılaştırma anlamsız
+        unchanged, validators = False, {key: record.get(key) for key in ("etag", "last_modified", "content_hash")}
+    else:
+        unchanged, validators = check_unchanged(url, record)
+    if unchanged:
+        # İçerik son etiketlemeden beri değişmedi; yeniden etiketleme atlanır
+        return {"_id": _id, "url": url, "unchanged": True, **validators}
     time.sleep(SLEEP_DELAY)
-    return tag_website(_id, url, use_playwright=use_playwright)
+    result = tag_website(_id, url, use_playwright=use_playwright)
+    if result and "error" not in result:
+        result.update(validators)
+    return result
 
 
 def load_environment_variables():
@@ -450,6 +491,16 @@ def save_results(mongo_db_context, batch_results, PROCESSED_SITES_SEO, PROCESSED
                  PROCESSED_SPIDER_COLL):
     """İşlenen sonuçları MongoDB'ye kaydeder ve günceller."""
     for result in batch_results:
+        validators = {key: result.pop(key, None) for key in ("etag", "last_modified", "content_hash")}
+        if result.pop("unchanged", False):
+            mongo_db_context.update_mongo_record(
+                PROCESSED_SPIDER_COLL,
+                {"_id": result["_id"]},
+                {"$set": {"last_processed_time": datetime.now()}}
+            )
+            print(f"[LOG] URL {result['url']} değişmemiş, yeniden etiketlenmedi.")
+            continue
+
         mongo_db_context.save_datas_to_mongo(PROCESSED_SITES_SEO, result)
         print(f"[LOG] URL {result['url']} processed_sites_seo koleksiyonuna kaydedildi.")
 
@@ -463,7 +514,7 @@ def save_results(mongo_db_context, batch_results, PROCESSED_SITES_SEO, PROCESSED
         mongo_db_context.update_mongo_record(
             PROCESSED_SPIDER_COLL,
             {"_id": result["_id"]},
-            {"$set": {"last_processed_time": datetime.now()}}
+            {"$set": {"last_processed_time": datetime.now(), **validators}}
         )
         print(f"[LOG] kayıt last_processed_time alanı güncellendi.")
 
@@ -488,7 +539,7 @@ def main():
 
         print(f"[LOG] {len(new_records)} yeni kayıt bulundu.")
         for record in new_records:
-            task_queue.put((record['_id'], record['url']))
+            task_queue.put((record['_id'], record['url'], record))
 
         print(f"[LOG] {task_queue.qsize()} kayıt işlenmek üzere kuyruğa eklendi.")
 
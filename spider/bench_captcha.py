@@ -0,0 +1,87 @@
+"""
+Captcha tespiti benchmark'ı.
+
+Kaydedilmiş sayfalarda önceki contains_captcha (dört ayrı tam ağaç taraması) ile
+bayt ön elemesi + yalnızca isabette DOM doğrulaması yapan yeni yol karşılaştırılır.
+DOM ağacı her iki yol için önceden kurulur; ölçülen yalnızca captcha kontrolüdür.
+İki yolun kararları farklıysa ilgili dosyalar listelenir.
+
+Kullanım:
+    python bench_captcha.py --pages saved_pages/ --rounds 5
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+import chardet
+from bs4 import BeautifulSoup
+
+from http_client import captcha_hint, contains_captcha
+
+
+def load_pages(directory: str) -> list[tuple[Path, bytes, BeautifulSoup]]:
+    pages = []
+    for path in sorted(p for p in Path(directory).rglob("*") if p.suffix.lower() in (".html", ".htm")):
+        raw_data = path.read_bytes()
+        encoding = chardet.detect(raw_data)["encoding"] or "utf-8"
+        soup = BeautifulSoup(raw_data.decode(encoding, errors="replace"), "html.parser")
+        pages.append((path, raw_data, soup))
+    return pages
+
+
+def legacy_contains_captcha(raw_data: bytes, soup) -> bool:
+    """ Önceki http_client.contains_captcha. """
+    body = soup.body if soup.body else soup
+    indicators = [
+        body.find(lambda tag: tag.has_attr("class") and any(re.search("captcha", cls, re.I) for cls in tag.get("class", []))),
+        body.find(lambda tag: tag.has_attr("id") and re.search("captcha", tag.get("id", ""), re.I)),
+        body.find("div", {"class": re.compile("g-recaptcha", re.I)}),
+        body.find("input", {"data-sitekey": True})
+    ]
+    return any(indicators)
+
+
+def prefilter_only(raw_data: bytes, soup) -> bool:
+    return captcha_hint(raw_data)
+
+
+def prefiltered(raw_data: bytes, soup) -> bool:
+    return captcha_hint(raw_data) and contains_captcha(soup)
+
+
+def run(name: str, func, pages: list, rounds: int) -> tuple[list[bool], float]:
+    verdicts = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        verdicts = [func(raw_data, soup) for _, raw_data, soup in pages]
+    elapsed = time.perf_counter() - started
+    per_page = elapsed / (len(pages) * rounds)
+    print(f"{name:<12} {1 / per_page:10.1f} sayfa/sn  {per_page * 1000:8.3f} ms/sayfa  {sum(verdicts)} isabet")
+    return verdicts, per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Captcha tespiti benchmark'ı")
+    parser.add_argument("--pages", default="saved_pages", help="Kaydedilmiş .html dosyalarının dizini")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print(f"{args.pages} altında .html dosyası bulunamadı.")
+        return
+    print(f"{len(pages)} sayfa, {args.rounds} tur")
+
+    legacy, legacy_time = run("dom", legacy_contains_captcha, pages, args.rounds)
+    run("bayt", prefilter_only, pages, args.rounds)
+    verdicts, new_time = run("bayt+dom", prefiltered, pages, args.rounds)
+
+    print(f"Kazanç: {legacy_time / new_time:.1f}x, sayfa başına {(legacy_time - new_time) * 1000:.3f} ms")
+    for (path, _, _), old, new in zip(pages, legacy, verdicts):
+        if old != new:
+            print(f"Farklı karar: {path} (dom={old}, bayt+dom={new})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Uçtan uca tarama benchmark'ı.
+
+Ayrı bir süreçte yerel bir aiohttp sunucusu, 127.0.0.1 üzerinde ardışık portlarda
+(her port ayrı bir host) üretilmiş bir site grafı yayınlar: Türkçe ve yabancı sayfalar,
+gecikmeli yanıtlar, MAX_PAGE_BYTES üstü büyük sayfalar, bir süre sonra 429 dönen ve
+CAPTCHA sayfası veren host'lar. async_spider bu grafın üzerinde baştan sona çalıştırılır;
+Mongo olarak yerel bir sunucu (varsayılan: ayrı bir veritabanı) ya da `mongomock://`
+(mongomock-motor) kullanılabilir. Seen-set ve frontier checkpoint'i geçici bir dizinde
+tutulur, yani her çalıştırma temiz başlar.
+
+Raporlanan: sayfa/sn (ilk ve son indirme arası), p50/p99 indirme süresi, sayfa başına
+CPU (ayrıştırma havuzu dahil) ve en yüksek RSS. `--baseline` verilirse sonuçlar önceki
+bir `--json` çıktısıyla karşılaştırılır; `--tolerance` dışındaki gerileme çıkış kodu 1
+ile biter.
+
+Kullanım:
+    python bench_crawl.py --hosts 20 --pages-per-host 100 --mongo-uri mongomock://
+    python bench_crawl.py --json sonuc.json
+    python bench_crawl.py --baseline sonuc.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import socket
+import tempfile
+import time
+
+TURKISH_WORDS = (
+    "ve bir bu da de için ile çok daha olarak kadar sonra göre değil ancak ise gibi "
+    "olan şekilde yeni büyük önemli türkiye şehir insanlar zaman yıl gün hakkında "
+    "bilgi haber eğitim öğrenci üniversite çalışma sağlık hizmet bölge ülke dünya "
+    "ekonomi yüzde açıklama yapılan edilen ediyor oluyor geliyor gösteriyor istanbul "
+    "ankara belediye başkan toplantı görüşme sorun çözüm proje kültür sanat müzik "
+    "kitap okul çocuk aile ev yemek su hava güzel iyi kötü küçük genç yaşlı "
+    "öğretmen doktor hastane yolculuk şöyle böyle niçin neden çünkü ayrıca özellikle"
+).split()
+
+FOREIGN_WORDS = (
+    "the and of to in is for that with on as by this from at are be was have it "
+    "not or an which new more city people time year day about information news "
+    "education student university work health service region country world economy "
+    "percent statement meeting problem solution project culture art music book school "
+    "child family home food water weather good bad small young old teacher doctor "
+    "hospital travel because also especially however between through during"
+).split()
+
+CAPTCHA_MARKUP = ('<form action="/verify"><div class="g-recaptcha" data-sitekey="6Lc-bench"></div>'
+                  '<input type="submit" value="Devam"></form>')
+
+
+class SyntheticSite:
+    """
+    Tohum (seed) ile belirlenen, sunucu ve istemci sürecinde aynı üretilen site grafı.
+    Host'lar sırasıyla olağan, kısıtlayan (`throttle_after` istekten sonra 429) ve CAPTCHA
+    host'larıdır; engel tüm host'a uygulandığından bu davranışlar ayrı host'lara konur.
+    Olağan host'ların `turkish_share` kadarı Türkçedir.
+    """
+
+    def __init__(self, hosts: int = 20, pages_per_host: int = 100, base_port: int = 18800, seed: int = 1,
+                 turkish_share: float = 0.6, links_per_page: int = 8, cross_host_share: float = 0.2,
+                 slow_share: float = 0.05, slow_delay: float = 0.5, large_share: float = 0.02,
+                 large_bytes: int = 3 * 1024 * 1024, throttled_hosts: int = 1, throttle_after: int = 5,
+                 captcha_hosts: int = 1, words_per_page: int = 150):
+        self.hosts = hosts
+        self.pages_per_host = pages_per_host
+        self.base_port = base_port
+        self.seed = seed
+        self.links_per_page = links_per_page
+        self.cross_host_share = cross_host_share
+        self.slow_share = slow_share
+        self.slow_delay = slow_delay
+        self.large_share = large_share
+        self.large_bytes = large_bytes
+        self.throttle_after = throttle_after
+        self.words_per_page = words_per_page
+        self.normal_hosts = max(1, hosts - throttled_hosts - captcha_hosts)
+        self.throttled = range(self.normal_hosts, min(hosts, self.normal_hosts + throttled_hosts))
+        self.captcha = range(self.throttled.stop, hosts)
+        rng = random.Random(seed)
+        self.turkish_hosts = {h for h in range(hosts) if rng.random() < turkish_share}
+
+    def url(self, host: int, page: int) -> str:
+        return f"http://127.0.0.1:{self.base_port + host}/p/{page}"
+
+    def ports(self) -> list[int]:
+        return [self.base_port + h for h in range(self.hosts)]
+
+    def seeds(self, count: int) -> list[str]:
+        return [self.url(h, 0) for h in range(min(count, self.normal_hosts))]
+
+    def _rng(self, host: int, page: int) -> random.Random:
+        return random.Random(self.seed * 1_000_003 + host * 100_003 + page)
+
+    def is_slow(self, host: int, page: int) -> bool:
+        return self._rng(host, page).random() < self.slow_share
+
+    def is_large(self, host: int, page: int) -> bool:
+        rng = self._rng(host, page)
+        rng.random()
+        return rng.random() < self.large_share
+
+    def page_html(self, host: int, page: int) -> bytes:
+        rng = self._rng(host, page)
+        words = TURKISH_WORDS if host in self.turkish_hosts else FOREIGN_WORDS
+        lang = "tr" if host in self.turkish_hosts else "en"
+        paragraphs = []
+        for _ in range(max(1, self.words_per_page // 30)):
+            paragraphs.append("<p>" + " ".join(rng.choice(words) for _ in range(30)) + ".</p>")
+        links = []
+        for _ in range(self.links_per_page):
+            target = rng.randrange(self.hosts) if rng.random() < self.cross_host_share else host
+            links.append(f'<a href="{self.url(target, rng.randrange(self.pages_per_host))}">'
+                         f'{rng.choice(words)} {rng.choice(words)}</a>')
+        body = "\n".join(paragraphs) + "\n<nav>" + " ".join(links) + "</nav>"
+        if host in self.captcha:
+            body = CAPTCHA_MARKUP + body
+        html = (f'<!DOCTYPE html><html lang="{lang}"><head><meta charset="utf-8">'
+                f"<title>{rng.choice(words)} {page}</title></head><body>{body}")
+        if self.is_large(host, page):
+            filler = "<p>" + " ".join(rng.choice(words) for _ in range(200)) + "</p>\n"
+            html += filler * (self.large_bytes // len(filler.encode("utf-8")) + 1)
+        return (html + "</body></html>").encode("utf-8")
+
+
+def serve(site_kwargs: dict, ready) -> None:
+    """ Sunucu süreci: her host için ayrı portta dinler, süreç sonlandırılana kadar çalışır. """
+    from aiohttp import web
+
+    site = SyntheticSite(**site_kwargs)
+    requests_per_host = [0] * site.hosts
+    robots = b"User-agent: *\nAllow: /\n"
+
+    async def handle_page(request: web.Request) -> web.Response:
+        host = request.transport.get_extra_info("sockname")[1] - site.base_port
+        page = int(request.match_info["page"])
+        if not 0 <= page < site.pages_per_host:
+            raise web.HTTPNotFound()
+        requests_per_host[host] += 1
+        if host in site.throttled and requests_per_host[host] > site.throttle_after:
+            return web.Response(status=429, headers={"Retry-After": "60"})
+        if site.is_slow(host, page):
+            await asyncio.sleep(site.slow_delay)
+        return web.Response(body=site.page_html(host, page), content_type="text/html", charset="utf-8")
+
+    async def handle_robots(request: web.Request) -> web.Response:
+        return web.Response(body=robots, content_type="text/plain")
+
+    async def run() -> None:
+        app = web.Application()
+        app.router.add_get("/robots.txt", handle_robots)
+        app.router.add_get("/p/{page}", handle_page)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        for port in site.ports():
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def patch_mongomock() -> None:
+    """ mongomock, pymongo 4.9+ ile gelen UpdateOne(sort=...) parametresini tanımıyor. """
+    from mongomock.collection import BulkOperationBuilder
+
+    add_update = BulkOperationBuilder.add_update
+
+    def compat_add_update(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    BulkOperationBuilder.add_update = compat_add_update
+
+
+def configure_environment(args, workdir: str) -> None:
+    """ Spider modülleri ayarlarını içe aktarılırken okuduğu için import'tan önce çağrılır. """
+    os.environ["SPIDER_MONGO_URI"] = args.mongo_uri
+    os.environ["SPIDER_MONGO_DB"] = args.mongo_db
+    os.environ["SPIDER_SEEN_PATH"] = os.path.join(workdir, "seen")
+    os.environ["SPIDER_CHECKPOINT_PATH"] = os.path.join(workdir, "frontier")
+    os.environ["SPIDER_METRICS_PORT"] = "0"
+    os.environ["SPIDER_HOST_RATE"] = str(args.host_rate)
+    os.environ["SPIDER_HOST_BURST"] = str(args.host_burst)
+
+
+def rusage() -> tuple[float, int, int]:
+    """ (toplam CPU sn, bu sürecin en yüksek RSS'i KB, beklenmiş alt süreçlerinki KB). """
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = self_usage.ru_utime + self_usage.ru_stime + children.ru_utime + children.ru_stime
+    return cpu, self_usage.ru_maxrss, children.ru_maxrss
+
+
+async def crawl(args, site: SyntheticSite) -> dict:
+    import main as spider
+    import metrics
+    from db_manager import MONGO_DB, bot_blocks, captcha_blocks, client
+
+    if not args.mongo_uri.startswith("mongomock://"):
+        await client.drop_database(MONGO_DB)
+    window = {"first": None, "last": None, "fetched": 0}
+
+    async def sample() -> None:
+        while True:
+            fetched = spider.crawl_stats["fetched"]
+            if fetched != window["fetched"]:
+                now = time.perf_counter()
+                window["first"] = window["first"] or now
+                window["last"] = now
+                window["fetched"] = fetched
+            await asyncio.sleep(0.05)
+
+    cpu_before, _, _ = rusage()
+    sampler = asyncio.create_task(sample())
+    try:
+        await spider.async_spider(site.seeds(args.seeds), concurrency=args.concurrency,
+                                  parse_workers=args.parse_workers, max_concurrency=args.max_concurrency,
+                                  metrics_port=0, idle_limit=args.idle_limit)
+    finally:
+        sampler.cancel()
+    # Ayrıştırma havuzu kapatıldığı için alt süreçlerin CPU'su da RUSAGE_CHILDREN'a eklenmiştir
+    cpu_after, rss_self, rss_children = rusage()
+
+    fetched = spider.crawl_stats["fetched"]
+    active = (window["last"] - window["first"]) if window["first"] else 0.0
+    report = {
+        **spider.crawl_stats,
+        "active_seconds": round(active, 3),
+        "pages_per_sec": round(fetched / active, 2) if active else 0.0,
+        "fetch_p50_ms": round(metrics.download_seconds.quantile(0.5) * 1000, 2),
+        "fetch_p99_ms": round(metrics.download_seconds.quantile(0.99) * 1000, 2),
+        "cpu_ms_per_page": round((cpu_after - cpu_before) * 1000 / fetched, 3) if fetched else 0.0,
+        "peak_rss_mb": round(rss_self / 1024, 1),
+        "peak_child_rss_mb": round(rss_children / 1024, 1),
+        "blocked_hosts": len(bot_blocks) + len(captcha_blocks),
+    }
+    print(f"[METRICS] {metrics.summary()}")
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """ Taban çizgisine göre `tolerance` oranından fazla kötüleşen ölçümler. """
+    regressions = []
+    higher_is_better = {"pages_per_sec"}
+    for key in ("pages_per_sec", "fetch_p99_ms", "cpu_ms_per_page", "peak_rss_mb"):
+        old, new = baseline.get(key), report.get(key)
+        if not old or new is None:
+            continue
+        change = (old - new) / old if key in higher_is_better else (new - old) / old
+        if change > tolerance:
+            regressions.append(f"{key}: {old} -> {new} ({change * 100:+.1f}% kötü)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik web üzerinde uçtan uca tarama benchmark'ı")
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--pages-per-host", type=int, default=100)
+    parser.add_argument("--base-port", type=int, default=18800)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seeds", type=int, default=4, help="Başlangıç URL'si verilen host sayısı")
+    parser.add_argument("--turkish-share", type=float, default=0.6)
+    parser.add_argument("--slow-share", type=float, default=0.05)
+    parser.add_argument("--slow-delay", type=float, default=0.5)
+    parser.add_argument("--large-share", type=float, default=0.02)
+    parser.add_argument("--throttled-hosts", type=int, default=1)
+    parser.add_argument("--captcha-hosts", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--max-concurrency", type=int, default=120)
+    parser.add_argument("--parse-workers", type=int, default=None, help="Varsayılan: SPIDER_PARSE_WORKERS")
+    parser.add_argument("--host-rate", type=float, default=50.0, help="Host başına saniyede istek (nezaket sınırı)")
+    parser.add_argument("--host-burst", type=float, default=10.0)
+    parser.add_argument("--idle-limit", type=int, default=1, help="Worker'ların durmadan önceki boş tur sayısı")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017", help="mongomock:// sunucusuz çalışır")
+    parser.add_argument("--mongo-db", default="HopeSearchBench", help="Çalıştırma başında silinir")
+    parser.add_argument("--json", help="Sonuçların yazılacağı dosya")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki --json çıktısı")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    if args.mongo_db == "HopeSearch":
+        parser.error("Benchmark veritabanı çalıştırma başında silinir; asıl veritabanı kullanılamaz.")
+
+    site_kwargs = dict(
+        hosts=args.hosts, pages_per_host=args.pages_per_host, base_port=args.base_port, seed=args.seed,
+        turkish_share=args.turkish_share, slow_share=args.slow_share, slow_delay=args.slow_delay,
+        large_share=args.large_share, throttled_hosts=args.throttled_hosts, captcha_hosts=args.captcha_hosts,
+    )
+    site = SyntheticSite(**site_kwargs)
+    workdir = tempfile.mkdtemp(prefix="bench_crawl_")
+    configure_environment(args, workdir)
+    if args.mongo_uri.startswith("mongomock://"):
+        patch_mongomock()
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    server = context.Process(target=serve, args=(site_kwargs, ready), daemon=True)
+    server.start()
+    try:
+        if not ready.wait(30):
+            raise RuntimeError("Sentetik sunucu başlatılamadı.")
+        wait_for_port(site.base_port)
+        print(f"{site.hosts} host x {site.pages_per_host} sayfa, "
+              f"{len(site.turkish_hosts)} Türkçe host, {args.seeds} başlangıç host'u")
+        report = asyncio.run(crawl(args, site))
+    finally:
+        server.terminate()
+        server.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{report['fetched']} sayfa ({report['turkish']} Türkçe, {report['failed']} başarısız), "
+          f"{report['blocked_hosts']} engelli host")
+    print(f"{report['pages_per_sec']:10.1f} sayfa/sn  {report['active_seconds']:.2f} sn aktif")
+    print(f"fetch p50 {report['fetch_p50_ms']:.1f} ms  p99 {report['fetch_p99_ms']:.1f} ms")
+    print(f"CPU {report['cpu_ms_per_page']:.3f} ms/sayfa  RSS {report['peak_rss_mb']:.1f} MB "
+          f"(alt süreç en fazla {report['peak_child_rss_mb']:.1f} MB)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"Gerileme: {line}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"Taban çizgisine göre gerileme yok (tolerans %{args.tolerance * 100:.0f}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Kaydedilmiş sayfalar üzerinde link çıkarma mikro-benchmark'ı.
+
+Mevcut yol (chardet + BeautifulSoup + find_all) ile ham bayt tarayan
+link_extractor.extract_links karşılaştırılır ve sayfa/saniye raporlanır. Önce
+bilinen sınır durumlarında iki yolun aynı linkleri bulduğu doğrulanır.
+
+Kullanım:
+    python bench_link_extractor.py --pages saved_pages/ --rounds 5
+"""
+import argparse
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+import chardet
+from bs4 import BeautifulSoup
+
+from link_extractor import extract_links
+
+
+# BeautifulSoup ile aynı sonucu vermesi gereken sınır durumları
+EDGE_CASES = [
+    b'<a data-href="/no" href="//cdn.com/z">x</a>',
+    b'<a title="a>b" href="/after-gt">x</a>',
+    b"<a title='c>d' href='/single-quoted'>x</a>",
+    b'<a xlink:href="/xlink" href="/real">x</a>',
+    b'<a HREF=/unquoted>x</a>',
+]
+
+
+def edge_case_mismatches() -> list[tuple[bytes, list[str], list[str]]]:
+    base_url = "http://ex.com/"
+    mismatches = []
+    for raw_data in EDGE_CASES:
+        soup = BeautifulSoup(raw_data.decode("utf-8"), "html.parser")
+        expected = [urljoin(base_url, a["href"].strip()) for a in soup.find_all("a", href=True)]
+        found = extract_links(raw_data, base_url)
+        if found != expected:
+            mismatches.append((raw_data, expected, found))
+    return mismatches
+
+
+def load_pages(directory: str) -> list[bytes]:
+    paths = sorted(p for p in Path(directory).rglob("*") if p.suffix.lower() in (".html", ".htm"))
+    return [p.read_bytes() for p in paths]
+
+
+def bs4_links(raw_data: bytes, base_url: str) -> list[str]:
+    encoding = chardet.detect(raw_data)["encoding"] or "utf-8"
+    text = raw_data.decode(encoding, errors="replace")
+    soup = BeautifulSoup(text, "html.parser")
+    links = []
+    for a_tag in soup.find_all("a", href=True):
+        href = a_tag["href"].strip()
+        if href.startswith("http"):
+            links.append(href)
+    return links
+
+
+def scan_links(raw_data: bytes, base_url: str) -> list[str]:
+    return extract_links(raw_data, base_url)
+
+
+def run(name: str, func, pages: list[bytes], rounds: int) -> None:
+    base_url = "http://bench.local/"
+    total_links = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for raw_data in pages:
+            total_links += len(func(raw_data, base_url))
+    elapsed = time.perf_counter() - started
+    count = len(pages) * rounds
+    print(f"{name:<12} {count / elapsed:10.1f} sayfa/sn  "
+          f"{elapsed / count * 1000:8.3f} ms/sayfa  {total_links // rounds} link/tur")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link çıkarma benchmark'ı")
+    parser.add_argument("--pages", default="saved_pages", help="Kaydedilmiş .html dosyalarının dizini")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    for raw_data, expected, found in edge_case_mismatches():
+        print(f"Farklı sonuç: {raw_data!r} bs4={expected} extractor={found}")
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print(f"{args.pages} altında .html dosyası bulunamadı.")
+        return
+    print(f"{len(pages)} sayfa, {sum(map(len, pages)) / 1024:.0f} KiB, {args.rounds} tur")
+    run("bs4", bs4_links, pages, args.rounds)
+    run("extractor", scan_links, pages, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Türkçe tespiti için doğruluk ve hız benchmark'ı.
+
+Kaydedilmiş sayfaların ilk TEXT_PREFIX_CHARS karakterlik metni üzerinde eski yol
+(paragraf başına langdetect) ile turkish_detector karşılaştırılır. Sayfalar `tr/` ve
+başka adlı alt dizinlere ayrılmışsa etiket dizin adından alınır; aksi halde langdetect
+kararı referans kabul edilip uyum oranı raporlanır. Önce yerleşik etiketli örneklerde
+(tr ile id/ms/az/hu) TURKISH_RATIO_THRESHOLD'un iki sınıfı ayırdığı doğrulanır.
+
+Kullanım:
+    python bench_turkish_detector.py --pages saved_pages/ --rounds 3
+"""
+import argparse
+import time
+from pathlib import Path
+
+import chardet
+from bs4 import BeautifulSoup
+from langdetect import DetectorFactory, detect
+
+from http_client import TEXT_PREFIX_CHARS, TURKISH_RATIO_THRESHOLD
+from turkish_detector import turkish_detector
+
+
+# Eşiği doğrulamak için yerleşik etiketli örnekler: Türkçe ve Türkçeyle karışabilen Latin alfabeli diller
+BUILTIN_SAMPLES = {
+    "id": [
+        ('Pemerintah daerah mengumumkan rencana pembangunan jalan baru di wilayah timur kota. '
+         'Proyek ini diharapkan dapat mengurangi kemacetan yang sering terjadi pada jam sibuk. '
+         'Warga menyambut baik rencana tersebut, tetapi mereka meminta agar pekerjaan dilakukan dengan cepat. '
+         'Dana pembangunan berasal dari anggaran provinsi dan bantuan pemerintah pusat. '
+         'Kepala dinas mengatakan bahwa lelang akan dibuka bulan depan.'),
+        ('Kesehatan anak sangat dipengaruhi oleh pola makan dan kebiasaan tidur sejak usia dini. '
+         'Para dokter menyarankan orang tua untuk memberikan sayur dan buah setiap hari. '
+         'Selain itu, anak perlu bermain di luar rumah agar tubuhnya tetap aktif. '
+         'Sekolah juga memiliki peran penting dalam membentuk kebiasaan yang sehat. '
+         'Program makan siang bersama telah diterapkan di beberapa sekolah dasar.'),
+        ('Universitas negeri itu membuka pendaftaran mahasiswa baru untuk tahun akademik mendatang. '
+         'Calon mahasiswa dapat mendaftar secara daring melalui situs resmi kampus. '
+         'Persyaratan yang harus dipenuhi antara lain ijazah, nilai rapor, dan surat keterangan sehat. '
+         'Biaya kuliah disesuaikan dengan kemampuan ekonomi keluarga. '
+         'Beasiswa tersedia bagi siswa berprestasi dari daerah terpencil.'),
+    ],
+    "ms": [
+        ('Kerajaan negeri telah meluluskan peruntukan tambahan bagi membaiki jalan raya di kawasan luar bandar. '
+         'Langkah ini diambil selepas penduduk membuat aduan mengenai keadaan jalan yang rosak teruk. '
+         'Kerja pembaikan dijangka bermula pada bulan hadapan dan siap dalam tempoh enam bulan. '
+         'Pihak berkuasa tempatan akan memantau kemajuan projek tersebut. '
+         'Orang ramai dinasihatkan supaya berhati-hati semasa memandu di kawasan kerja.'),
+        ('Persatuan peniaga kecil menganjurkan pameran produk tempatan di dewan orang ramai minggu ini. '
+         'Lebih daripada seratus gerai menjual makanan, pakaian dan barangan kraf tangan. '
+         'Penganjur berharap acara ini dapat membantu peniaga meningkatkan jualan mereka. '
+         'Pengunjung boleh menikmati persembahan kebudayaan pada setiap petang. '
+         'Tiket masuk adalah percuma untuk semua lapisan masyarakat.'),
+    ],
+    "az": [
+        ('Azərbaycan Respublikasının Təhsil Nazirliyi yeni tədris ili üçün proqramları açıqlayıb. '
+         'Məktəblərdə rəqəmsal dərsliklərin istifadəsi genişləndiriləcək və müəllimlər üçün əlavə kurslar təşkil olunacaq. '
+         'Nazirlik bildirib ki, bu addım şagirdlərin bilik səviyyəsini artırmaq məqsədi daşıyır. '
+         'Valideynlər də yeniliklərlə bağlı məlumatlandırılacaq. '
+         'Layihənin ilk mərhələsi paytaxtda həyata keçiriləcək.'),
+        ('Bakıda keçirilən beynəlxalq sərgidə yüzdən çox şirkət öz məhsullarını nümayiş etdirib. '
+         'Sərgidə kənd təsərrüfatı, enerji və texnologiya sahələrinə aid yeniliklər təqdim olunub. '
+         'Ziyarətçilər yerli istehsalçıların məhsullarına böyük maraq göstəriblər. '
+         'Təşkilatçılar növbəti ilin sərgisinin daha geniş olacağını vəd ediblər. '
+         'Tədbir üç gün davam edəcək.'),
+    ],
+    "hu": [
+        ('A városi önkormányzat bejelentette, hogy jövő tavasszal felújítják a főteret és a környező utcákat. '
+         'A munkálatok során új járdák, padok és közvilágítás készül. '
+         'A lakók egy része aggódik a forgalmi korlátozások miatt, ezért a hivatal tájékoztató fórumot szervez. '
+         'A beruházás költségét uniós pályázatból és a város saját forrásaiból fedezik. '
+         'A tervek szerint a felújítás ősszel fejeződik be.'),
+        ('Az egyetem kutatói új módszert fejlesztettek ki a talaj nedvességtartalmának mérésére. '
+         'Az eljárás olcsóbb és gyorsabb, mint a korábbi eszközök, ezért a gazdák is könnyen használhatják. '
+         'A fejlesztést több hazai mezőgazdasági vállalat is támogatta. '
+         'A kutatócsoport jövőre szeretné kiterjeszteni a vizsgálatokat más régiókra. '
+         'Az eredményeket egy nemzetközi folyóiratban publikálták.'),
+    ],
+    "tr": [
+        ('Belediye, şehir merkezindeki tarihi çarşının yenilenmesi için hazırlanan projeyi kamuoyuyla paylaştı. '
+         'Çalışmalar kapsamında dükkânların cepheleri onarılacak, sokaklara yeni aydınlatma sistemi kurulacak. '
+         'Esnaf, yenileme sürecinde işlerinin aksamasından endişe ettiğini belirtti. '
+         'Belediye başkanı, çalışmaların turizm sezonu başlamadan tamamlanacağını söyledi. '
+         'Projenin maliyeti büyükşehir bütçesinden karşılanacak.'),
+        ('Üniversite hastanesinde görev yapan doktorlar, kış aylarında artan grip vakalarına karşı uyarıda bulundu. '
+         'Uzmanlar, özellikle yaşlıların ve kronik hastalığı olanların aşı yaptırmasını öneriyor. '
+         'Kalabalık ortamlarda maske takmanın ve elleri sık sık yıkamanın önemi vurgulandı. '
+         'Hastane yönetimi, acil servisteki yoğunluğun geçen yıla göre arttığını açıkladı. '
+         'Vatandaşlar belirti gösterdiklerinde aile hekimine başvurmalı.'),
+        ('Milli takım, hazırlık maçında rakibini iki golle mağlup ederek turnuvaya moralli başladı. '
+         'Teknik direktör, genç oyunculara şans vereceğini ve kadroda değişiklikler yapacağını açıkladı. '
+         'Taraftarlar stadyumu doldurarak takımlarına büyük destek verdi. '
+         'Maçın ardından oyuncular, hedeflerinin grubu lider olarak tamamlamak olduğunu söyledi. '
+         'Bir sonraki karşılaşma cumartesi akşamı oynanacak.'),
+    ],
+}
+
+
+def load_samples(directory: str) -> list[tuple[str, bool | None]]:
+    root = Path(directory)
+    samples = []
+    for path in sorted(p for p in root.rglob("*") if p.suffix.lower() in (".html", ".htm")):
+        raw_data = path.read_bytes()
+        encoding = chardet.detect(raw_data)["encoding"] or "utf-8"
+        soup = BeautifulSoup(raw_data.decode(encoding, errors="replace"), "html.parser")
+        text = soup.get_text(separator=" ", strip=True)[:TEXT_PREFIX_CHARS]
+        parts = path.relative_to(root).parts
+        label = parts[0] == "tr" if len(parts) > 1 else None
+        samples.append((text, label))
+    return samples
+
+
+def langdetect_ratio(clean_text: str) -> float:
+    """ Önceki http_client.turkish_ratio: paragraf başına langdetect. """
+    if len(clean_text.split()) < 20:
+        return 0.0
+    turkish_count = 0
+    total_checked = 0
+    for paragraph in clean_text.split(". "):
+        if len(paragraph) > 10:
+            try:
+                if detect(paragraph) == "tr":
+                    turkish_count += 1
+                total_checked += 1
+            except Exception:
+                pass
+    return turkish_count / total_checked if total_checked else 0.0
+
+
+def detector_ratio(clean_text: str) -> float:
+    return turkish_detector.turkish_ratio(clean_text, TURKISH_RATIO_THRESHOLD)
+
+
+def run(name: str, func, texts: list[str], rounds: int) -> list[bool]:
+    verdicts = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        verdicts = [func(text) >= TURKISH_RATIO_THRESHOLD for text in texts]
+    elapsed = time.perf_counter() - started
+    count = len(texts) * rounds
+    print(f"{name:<12} {count / elapsed:10.1f} sayfa/sn  {elapsed / count * 1000:8.3f} ms/sayfa  "
+          f"{sum(verdicts)} Türkçe")
+    return verdicts
+
+
+def report(name: str, verdicts: list[bool], labels: list[bool]) -> None:
+    tp = sum(v and l for v, l in zip(verdicts, labels))
+    fp = sum(v and not l for v, l in zip(verdicts, labels))
+    fn = sum(l and not v for v, l in zip(verdicts, labels))
+    accuracy = sum(v == l for v, l in zip(verdicts, labels)) / len(labels)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"{name:<12} doğruluk={accuracy:.3f}  kesinlik={precision:.3f}  duyarlılık={recall:.3f}")
+
+
+def check_threshold() -> None:
+    """ Yerleşik örneklerde dil başına oranlar; eşik Türkçe ile diğerlerini ayırmıyorsa uyarır. """
+    DetectorFactory.seed = 0
+    lowest_turkish, highest_other = 1.0, 0.0
+    for lang, texts in BUILTIN_SAMPLES.items():
+        ratios = [detector_ratio(text) for text in texts]
+        reference = [langdetect_ratio(text) for text in texts]
+        print(f"{lang:<4} detector={', '.join(f'{r:.2f}' for r in ratios)}  "
+              f"langdetect={', '.join(f'{r:.2f}' for r in reference)}")
+        if lang == "tr":
+            lowest_turkish = min(lowest_turkish, *ratios)
+        else:
+            highest_other = max(highest_other, *ratios)
+    if highest_other < TURKISH_RATIO_THRESHOLD <= lowest_turkish:
+        print(f"Eşik {TURKISH_RATIO_THRESHOLD} ayırıyor (Türkçe en düşük {lowest_turkish:.2f}, "
+              f"diğer en yüksek {highest_other:.2f}).")
+    else:
+        print(f"UYARI: eşik {TURKISH_RATIO_THRESHOLD} ayırmıyor (Türkçe en düşük {lowest_turkish:.2f}, "
+              f"diğer en yüksek {highest_other:.2f}).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Türkçe tespiti benchmark'ı")
+    parser.add_argument("--pages", default="saved_pages", help="Kaydedilmiş .html dosyalarının dizini")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    check_threshold()
+    samples = load_samples(args.pages)
+    if not samples:
+        print(f"{args.pages} altında .html dosyası bulunamadı.")
+        return
+    texts = [text for text, _ in samples]
+    print(f"{len(texts)} sayfa, {args.rounds} tur")
+
+    DetectorFactory.seed = 0  # langdetect referansı turlar arasında sabit kalsın
+    reference = run("langdetect", langdetect_ratio, texts, args.rounds)
+    verdicts = run("detector", detector_ratio, texts, args.rounds)
+
+    if all(label is not None for _, label in samples):
+        labels = [label for _, label in samples]
+        report("langdetect", reference, labels)
+        report("detector", verdicts, labels)
+    else:
+        agreement = sum(a == b for a, b in zip(reference, verdicts)) / len(texts)
+        print(f"Etiket yok; langdetect ile uyum: {agreement:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import heapq
+import logging
+import time
+from datetime import datetime
+
+from pymongo import DeleteMany, UpdateOne
+
+from bulk_writer import BulkWriter
+from canonical import canonical_host, canonicalize
+from checkpoint import frontier_checkpoint
+
+logger = logging.getLogger("AsyncSpider")
+
+BLOCK_SECONDS = 30 * 60
+MAX_PARKED_PER_HOST = 1000
+
+# park() sonuçları: host engelli değil / URL park edildi / host'un park kotası dolu
+NOT_BLOCKED, PARKED, PARK_FULL = 0, 1, 2
+
+
+def block_host(value: str) -> str:
+    """ Eski kayıtlarda tam URL, yenilerde host tutulur; ikisi de host'a indirgenir. """
+    return canonical_host(value) if "://" in value else value.lower()
+
+
+class BlockManager:
+    """
+    Host bazlı engel tablosu. Engel süresi dolana kadar host'un tüm URL'leri istek
+    atılmadan park edilir; süre dolunca park edilenler tek seferde kuyruğa geri verilir.
+    `is_blocked` senkron bir sözlük okumasıdır. Süre sonları bir min-heap'te tutulur,
+    böylece `pop_expired` yalnızca süresi gerçekten dolmuş host'lara dokunur. Mongo
+    kaydı (`url` alanında host, `expires`, `parked`) write-behind tamponuyla yazılır;
+    `kind` aynı checkpoint'te bot ve CAPTCHA tablolarını ayırır.
+    """
+
+    def __init__(self, writer: BulkWriter, kind: str, block_seconds: int = BLOCK_SECONDS,
+                 max_parked_per_host: int = MAX_PARKED_PER_HOST):
+        self.writer = writer
+        self.kind = kind
+        self.block_seconds = block_seconds
+        self.max_parked_per_host = max_parked_per_host
+        self._expires: dict[str, float] = {}          # host -> bitiş zamanı (epoch)
+        self._heap: list[tuple[float, str]] = []
+        self._parked: dict[str, dict[str, int]] = {}  # host -> {url: depth}
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def is_blocked_host(self, host: str) -> bool:
+        expires = self._expires.get(host)
+        return expires is not None and expires > time.time()
+
+    def is_blocked(self, url: str) -> bool:
+        if not self._expires:
+            return False  # olağan durum: host çözümlemesine gerek yok
+        return self.is_blocked_host(canonical_host(url))
+
+    def expires(self, url: str) -> float:
+        """ URL'nin host'unun engel bitiş zamanı (epoch); engel yoksa 0. """
+        if not self._expires:
+            return 0.0
+        return self._expires.get(canonical_host(url), 0.0)
+
+    def parked_count(self) -> int:
+        return sum(len(urls) for urls in self._parked.values())
+
+    def _set(self, host: str, expires: float) -> None:
+        self._expires[host] = expires
+        heapq.heappush(self._heap, (expires, host))
+
+    def restore(self, host: str, expires: float, parked: dict[str, int] | None = None) -> None:
+        """ Kaydı kalıcı yazmadan yükler (checkpoint ya da Mongo'dan açılışta). """
+        self._set(host, expires)
+        if parked:
+            self._parked.setdefault(host, {}).update(parked)
+
+    async def block(self, url: str, depth: int | None = None) -> str:
+        """ URL'nin host'unu engeller; `depth` verilirse URL süre dolunca yeniden denenmek üzere park edilir. """
+        url = canonicalize(url)
+        host = canonical_host(url)
+        now = datetime.now()
+        expires = now.timestamp() + self.block_seconds
+        self._set(host, expires)
+        frontier_checkpoint.host_blocked(self.kind, host, expires)
+        await self.writer.add(UpdateOne(
+            {"url": host},
+            {"$set": {"blocked_time": now, "expires": datetime.fromtimestamp(expires)}},
+            upsert=True,
+        ))
+        if depth is not None:
+            await self.park(url, depth)
+        return host
+
+    async def park(self, url: str, depth: int) -> int:
+        """
+        Host engelliyse URL'yi park eder ve PARKED döner. Host'un park kotası dolduysa URL
+        saklanmaz ve PARK_FULL döner; URL'yi kuyrukta tutmak çağıranın işidir.
+        """
+        if not self._expires:
+            return NOT_BLOCKED
+        url = canonicalize(url)
+        host = canonical_host(url)
+        if not self.is_blocked_host(host):
+            return NOT_BLOCKED
+        parked = self._parked.setdefault(host, {})
+        if url in parked:
+            return PARKED
+        if len(parked) >= self.max_parked_per_host:
+            return PARK_FULL
+        parked[url] = depth
+        frontier_checkpoint.url_parked(self.kind, host, url, depth)
+        # Engel kaydıyla aynı sırasız toplu yazımda gelebilir; bu yüzden upsert
+        await self.writer.add(UpdateOne(
+            {"url": host},
+            {"$push": {"parked": {"$each": [[url, depth]], "$slice": self.max_parked_per_host}}},
+            upsert=True,
+        ))
+        return PARKED
+
+    def pop_expired(self) -> dict[str, dict[str, int]]:
+        """ Süresi dolan host'ları tablodan çıkarır; host -> park edilmiş {url: depth}. """
+        now = time.time()
+        expired = {}
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires, host = heapq.heappop(heap)
+            if self._expires.get(host) != expires:
+                continue  # engel uzatılmış; yeni süresiyle heap'te
+            del self._expires[host]
+            expired[host] = self._parked.pop(host, {})
+        return expired
+
+    async def expire(self) -> list[tuple[str, int]]:
+        """ Süresi dolan engelleri toplu siler ve park edilmiş URL'leri döner. """
+        expired = self.pop_expired()
+        if not expired:
+            return []
+        for host in expired:
+            frontier_checkpoint.host_unblocked(self.kind, host)
+        await self.writer.add(DeleteMany({"url": {"$in": list(expired)}}))
+        return [url_depth for parked in expired.values() for url_depth in parked.items()]
+
+    async def load(self, collection) -> None:
+        """ Açılışta tabloyu checkpoint'ten, o yoksa bir kez Mongo'dan yükler. """
+        if frontier_checkpoint.tables_loaded:
+            for host, (expires, parked) in frontier_checkpoint.blocks.get(self.kind, {}).items():
+                self.restore(host, expires, parked)
+            return
+        legacy = []
+        async for doc in collection.find({}, {"_id": 0}):
+            host = block_host(doc["url"])
+            if doc.get("expires") is not None:
+                expires = doc["expires"].timestamp()
+            elif doc.get("blocked_time") is not None:
+                expires = doc["blocked_time"].timestamp() + self.block_seconds
+            else:
+                expires = 0.0  # yalnızca park kaydı kalmış; ilk turda kuyruğa geri verilir
+            parked = {url: depth for url, depth in doc.get("parked", [])}
+            self.restore(host, expires, parked)
+            frontier_checkpoint.host_blocked(self.kind, host, expires)
+            for url, depth in parked.items():
+                frontier_checkpoint.url_parked(self.kind, host, url, depth)
+            if doc["url"] != host:
+                legacy.append(doc["url"])
+                await self.writer.add(UpdateOne(
+                    {"url": host},
+                    {"$set": {"blocked_time": datetime.fromtimestamp(expires - self.block_seconds),
+                              "expires": datetime.fromtimestamp(expires)}},
+                    upsert=True,
+                ))
+        if legacy:
+            # URL bazlı eski kayıtlar host kaydına taşınır
+            await self.writer.add(DeleteMany({"url": {"$in": legacy}}))
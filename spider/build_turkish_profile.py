@@ -0,0 +1,83 @@
+"""
+turkish_detector için karakter n-gram profilini üretir.
+
+langdetect ile gelen Wikipedia profillerinden Türkçe ve Latin alfabeli diğer dillerin
+2/3-gram olasılıkları okunur; her n-gram için log P(g | tr) - log P(g | diğer) oranı
+hesaplanıp config/turkish_ngrams.json dosyasına yazılır. Çalışma zamanında langdetect
+gerekmez; bu betik yalnızca profil yenilenecekse çalıştırılır.
+
+Kullanım:
+    python build_turkish_profile.py --out config/turkish_ngrams.json --max-ngrams 12000
+"""
+import argparse
+import json
+import math
+import os
+
+import langdetect
+
+TURKISH = "tr"
+BACKGROUND = (
+    "af", "ca", "cs", "cy", "da", "de", "en", "es", "et", "fi", "fr", "hr", "hu", "id",
+    "it", "lt", "lv", "nl", "no", "pl", "pt", "ro", "sk", "sl", "so", "sq", "sv", "sw",
+    "tl", "vi",
+)
+NGRAM_SIZES = (2, 3)
+LATIN_MAX_CODEPOINT = 0x024F   # Latin Extended-B sonu; diğer alfabeler bilinmeyen sayılır
+
+
+def normalize_case(text: str) -> str:
+    # Dili bilinmeyen metinde "I" noktasız ı'ya çevrilemez; yalnızca "İ" ayrıca ele alınır
+    return text.replace("İ", "i").lower()
+
+
+def load_profile(lang: str) -> dict[str, float]:
+    """ Profildeki 2/3-gram'ların küçük harfe indirgenmiş olasılıkları. """
+    path = os.path.join(os.path.dirname(langdetect.__file__), "profiles", lang)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    probs: dict[str, float] = {}
+    for gram, count in data["freq"].items():
+        if len(gram) not in NGRAM_SIZES or any(ord(ch) > LATIN_MAX_CODEPOINT for ch in gram):
+            continue
+        key = normalize_case(gram)
+        probs[key] = probs.get(key, 0.0) + count / data["n_words"][len(gram) - 1]
+    return probs
+
+
+def build(max_ngrams: int) -> dict:
+    turkish = load_profile(TURKISH)
+    backgrounds = [load_profile(lang) for lang in BACKGROUND]
+    floor = min(turkish.values()) / 2
+    grams = set(turkish)
+    for profile in backgrounds:
+        grams.update(profile)
+
+    scores = []
+    for gram in grams:
+        p_tr = turkish.get(gram, floor)
+        p_bg = sum(profile.get(gram, floor) for profile in backgrounds) / len(backgrounds)
+        llr = math.log(p_tr) - math.log(p_bg)
+        # Sık görülen ve ayırt edici n-gram'lar öne alınır
+        scores.append((abs(llr) * math.sqrt(max(p_tr, p_bg)), gram, llr))
+    scores.sort(reverse=True)
+    return {
+        "NGRAM_SIZES": list(NGRAM_SIZES),
+        "LOG_RATIOS": {gram: round(llr, 3) for _, gram, llr in scores[:max_ngrams]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Türkçe n-gram profilini üretir")
+    parser.add_argument("--out", default="config/turkish_ngrams.json")
+    parser.add_argument("--max-ngrams", type=int, default=12000)
+    args = parser.parse_args()
+
+    profile = build(args.max_ngrams)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=0, sort_keys=True)
+    print(f"{len(profile['LOG_RATIOS'])} n-gram yazıldı: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
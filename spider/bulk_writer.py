@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+import metrics
+
+logger = logging.getLogger("AsyncSpider")
+
+DUPLICATE_KEY = 11000
+
+
+class BulkWriter:
+    """
+    Bir koleksiyona giden yazma işlemlerini (InsertOne/UpdateOne/DeleteOne...) biriktirip
+    `bulk_write` ile toplu gönderir. Tampon `max_batch` işleme ulaştığında
+    ya da `flush_interval` saniye dolduğunda boşaltılır. Bekleyen işlem sayısı
+    `max_pending`'i aşarsa `add` çağıran taraf boşaltma bitene kadar bekler (back-pressure).
+    Aynı anahtara farklı türde işlemler (upsert + silme gibi) giden koleksiyonlarda
+    `ordered=True` verilmelidir; sırasız yazımda sunucu işlemleri türe göre gruplar.
+    """
+
+    def __init__(self, collection, max_batch: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 10000, ordered: bool = False):
+        self.collection = collection
+        self.ordered = ordered
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._ops = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def name(self) -> str:
+        return self.collection.name
+
+    def pending(self) -> int:
+        return len(self._ops)
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def add(self, op) -> None:
+        self._ensure_started()
+        self._ops.append(op)
+        await self._after_add()
+
+    async def add_many(self, ops) -> None:
+        self._ensure_started()
+        self._ops.extend(ops)
+        await self._after_add()
+
+    async def _after_add(self) -> None:
+        if len(self._ops) >= self.max_pending:
+            try:
+                await self.flush()
+            except PyMongoError:
+                pass  # _write logladı; işlemler tamponda bekliyor
+        elif len(self._ops) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                try:
+                    await self.flush()
+                except PyMongoError:
+                    pass  # _write logladı; bir sonraki turda yeniden denenir
+        except asyncio.CancelledError:
+            pass
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            while self._ops:
+                batch = self._ops[:self.max_batch]
+                del self._ops[:self.max_batch]
+                await self._write(batch)
+
+    async def _write(self, batch: list) -> None:
+        started = time.perf_counter()
+        try:
+            while batch:
+                try:
+                    await self.collection.bulk_write(batch, ordered=self.ordered)
+                    done, batch = len(batch), []
+                    errors = []
+                except BulkWriteError as e:
+                    errors = e.details.get("writeErrors", [])
+                    if self.ordered and errors:
+                        # Sıralı yazım ilk hatada durur: hatalı işlem atlanır, kalanlar yeniden gönderilir
+                        failed_at = errors[0]["index"]
+                        done, batch = failed_at, batch[failed_at + 1:]
+                    else:
+                        done, batch = len(batch) - len(errors), []
+                self.written += done
+                metrics.mongo_ops_total.inc(done, collection=self.name)
+                real_errors = [err for err in errors if err.get("code") != DUPLICATE_KEY]
+                if real_errors:
+                    self.failed += len(real_errors)
+                    logger.warning(
+                        f"[BULK] {self.name}: {len(real_errors)} işlem başarısız "
+                        f"(ilk hata: {real_errors[0].get('errmsg')})"
+                    )
+        except PyMongoError:
+            # Geçici hata: işlemler tamponun başına geri konur, bir sonraki boşaltmada denenir
+            if len(self._ops) + len(batch) <= self.max_pending:
+                self._ops[:0] = batch
+                logger.warning(f"[BULK] {self.name}: yazma başarısız, {len(batch)} işlem yeniden denenecek.", exc_info=True)
+                raise
+            self.failed += len(batch)
+            logger.error(f"[BULK] {self.name}: yazma başarısız, {len(batch)} işlem düşürüldü.", exc_info=True)
+        finally:
+            metrics.mongo_write_seconds.observe(time.perf_counter() - started, collection=self.name)
+
+    async def close(self) -> None:
+        """ Arka plan görevini durdurur ve tamponda kalanları garanti olarak yazar. """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _ in range(3):
+            try:
+                await self.flush()
+                return
+            except PyMongoError:
+                await asyncio.sleep(1)
+        if self._ops:
+            logger.error(f"[BULK] {self.name}: kapanışta {len(self._ops)} işlem yazılamadı.")
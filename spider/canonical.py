@@ -0,0 +1,159 @@
+import json
+import logging
+from fnmatch import fnmatchcase
+from typing import Iterable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger("AsyncSpider")
+
+CANONICAL_RULES_PATH = "config/canonical_rules.json"
+
+DEFAULT_STRIP_PARAMS = [
+    "utm_*", "gclid", "dclid", "fbclid", "yclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref_src", "phpsessid", "jsessionid", "aspsessionid*", "sid", "sessionid",
+    "session_id", "cfid", "cftoken",
+]
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class _HostRules:
+    __slots__ = ("strip_params", "keep_params", "strip_trailing_slash", "sort_query")
+
+    def __init__(self, strip_params: Iterable[str], keep_params: Iterable[str],
+                 strip_trailing_slash: bool, sort_query: bool):
+        self.strip_params = tuple(p.lower() for p in strip_params)
+        self.keep_params = frozenset(p.lower() for p in keep_params)
+        self.strip_trailing_slash = strip_trailing_slash
+        self.sort_query = sort_query
+
+    def drops(self, name: str) -> bool:
+        name = name.lower()
+        if name in self.keep_params:
+            return False
+        return any(fnmatchcase(name, pattern) for pattern in self.strip_params)
+
+
+class UrlCanonicalizer:
+    """
+    Kuyruğa almadan önce URL'leri tek biçime indirger: şema/host küçük harf, varsayılan
+    port ve fragment atılır, `;jsessionid=` gibi yol parametreleri ile izleme/oturum
+    parametreleri silinir, kalan sorgu parametreleri sıralanır ve kök dışındaki sondaki
+    `/` kaldırılır. Ayarlar host bazında değiştirilebilir; HOST_RULES altındaki bir
+    domain (alt domainleriyle) ek STRIP_PARAMS, silinmemesi gereken KEEP_PARAMS ve kendi
+    STRIP_TRAILING_SLASH / SORT_QUERY değerlerini tanımlayabilir.
+    """
+
+    def __init__(self, strip_params: Iterable[str] = DEFAULT_STRIP_PARAMS,
+                 strip_trailing_slash: bool = True, sort_query: bool = True,
+                 host_rules: dict[str, dict] | None = None):
+        self.default = _HostRules(strip_params, (), strip_trailing_slash, sort_query)
+        self.host_rules: dict[str, _HostRules] = {}
+        for host, rules in (host_rules or {}).items():
+            self.host_rules[host.lower().strip(".")] = _HostRules(
+                list(strip_params) + rules.get("STRIP_PARAMS", []),
+                rules.get("KEEP_PARAMS", []),
+                rules.get("STRIP_TRAILING_SLASH", strip_trailing_slash),
+                rules.get("SORT_QUERY", sort_query),
+            )
+
+    def rules_for(self, host: str) -> _HostRules:
+        if self.host_rules:
+            labels = host.split(".")
+            for i in range(len(labels) - 1):
+                rules = self.host_rules.get(".".join(labels[i:]))
+                if rules is not None:
+                    return rules
+        return self.default
+
+    def canonicalize(self, url: str) -> str | None:
+        """ Kanonik URL'yi döner; http(s) olmayan ya da çözümlenemeyen URL'ler için None. """
+        try:
+            parts = urlsplit(url.strip())
+            scheme = parts.scheme.lower()
+            if scheme not in DEFAULT_PORTS:
+                return None
+            host = (parts.hostname or "").strip(".")
+            port = parts.port
+        except ValueError:
+            return None
+        if not host:
+            return None
+        if ":" in host:
+            host = f"[{host}]"  # IPv6
+        netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+        rules = self.rules_for(host)
+
+        path = parts.path or "/"
+        if ";" in path:
+            path = self._strip_path_params(path, rules)
+        if rules.strip_trailing_slash and len(path) > 1 and path.endswith("/"):
+            path = path.rstrip("/") or "/"
+
+        query = parts.query
+        if query:
+            params = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if not rules.drops(k)]
+            if rules.sort_query:
+                params.sort()
+            query = urlencode(params)
+        return urlunsplit((scheme, netloc, path, query, ""))
+
+    @staticmethod
+    def _strip_path_params(path: str, rules: _HostRules) -> str:
+        """ Java/PHP oturum kimlikleri `;jsessionid=...` gibi yol parametresi olarak gelebilir. """
+        segments = []
+        for segment in path.split("/"):
+            name, _, params = segment.partition(";")
+            kept = [p for p in params.split(";") if p and not rules.drops(p.split("=", 1)[0])]
+            segments.append(";".join([name, *kept]))
+        return "/".join(segments)
+
+    def canonicalize_many(self, urls: Iterable[str]) -> list[str]:
+        """ Kanonik biçimleri sırayı koruyarak ve tekrarsız döner; geçersiz URL'ler atlanır. """
+        seen = set()
+        result = []
+        for url in urls:
+            canonical = self.canonicalize(url)
+            if canonical is not None and canonical not in seen:
+                seen.add(canonical)
+                result.append(canonical)
+        return result
+
+    @classmethod
+    def from_config(cls, path: str = CANONICAL_RULES_PATH) -> "UrlCanonicalizer":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                data.get("STRIP_PARAMS", DEFAULT_STRIP_PARAMS),
+                data.get("STRIP_TRAILING_SLASH", True),
+                data.get("SORT_QUERY", True),
+                data.get("HOST_RULES", {}),
+            )
+        except Exception as e:
+            logger.warning(f"{path} okunamadı, varsayılan kanonikleştirme kuralları kullanılıyor: {e}")
+            return cls()
+
+
+canonicalizer = UrlCanonicalizer.from_config()
+
+
+def reload_canonical_rules(path: str = CANONICAL_RULES_PATH) -> None:
+    global canonicalizer
+    canonicalizer = UrlCanonicalizer.from_config(path)
+
+
+def canonicalize(url: str) -> str:
+    """ Kanonik URL; kanonikleştirilemeyen değerler olduğu gibi döner (sözlük anahtarları için). """
+    return canonicalizer.canonicalize(url) or url
+
+
+def canonicalize_many(urls: Iterable[str]) -> list[str]:
+    return canonicalizer.canonicalize_many(urls)
+
+
+def canonical_host(url: str) -> str:
+    """ Varsayılan portu atılmış, küçük harf host (port varsa host:port). """
+    canonical = canonicalizer.canonicalize(url)
+    if canonical is None:
+        return urlsplit(url).netloc.lower()
+    return urlsplit(canonical).netloc
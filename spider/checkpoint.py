@@ -0,0 +1,237 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: dizin kilidi yok, shard başına ayrı dizin kullanılmalı
+    fcntl = None
+
+logger = logging.getLogger("AsyncSpider")
+
+# Boş değer checkpoint'i kapatır; çok süreçli çalışmada launcher shard başına dizin verir
+CHECKPOINT_PATH = os.getenv("SPIDER_CHECKPOINT_PATH", "data/frontier")
+COMPACT_EVERY = int(os.getenv("SPIDER_CHECKPOINT_COMPACT_EVERY", 20000))
+SNAPSHOT_VERSION = 2
+
+
+def new_lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class FrontierCheckpoint:
+    """
+    Yerel frontier durumunun disk kopyası. Her değişiklik append-only bir log'a
+    (frontier.log, satır başına bir JSON kaydı) eklenir; log COMPACT_EVERY kaydı aşınca
+    tüm durum snapshot.json'a yazılır ve log sıfırlanır. Açılışta snapshot üzerine log
+    yeniden oynatılır. Kayıtlar anahtar bazında "son yazan kazanır" olduğundan yarım
+    kalan sıkıştırma ya da yarım yazılmış son satır durumu bozmaz.
+
+    Tutulanlar: kiralanıp henüz işlenmemiş URL'ler, host bazlı bot/CAPTCHA engelleri ve
+    park edilmiş URL'leri, süreçler arası kalıcı kira sahibi (LEASE_OWNER) ve blok
+    tablolarının Mongo'dan bir kez yüklendiği bilgisi. Seen-set zaten
+    mmap Bloom dosyasında kalıcıdır.
+    """
+
+    def __init__(self, directory: str = CHECKPOINT_PATH, compact_every: int = COMPACT_EVERY):
+        self.directory = directory
+        self.compact_every = compact_every
+        self.pending: dict[str, list[int]] = {}      # url -> [depth, priority]
+        # tür ("bot"/"captcha") -> host -> [bitiş zamanı (epoch), {park edilen url: depth}]
+        self.blocks: dict[str, dict[str, list]] = {}
+        self.lease_owner: str | None = None
+        self.tables_loaded = False
+        self._log = None
+        self._lock_file = None
+        self._entries = 0
+        self._stale_tables = False
+        if directory:
+            self._open()
+        if self.lease_owner is None:
+            self.lease_owner = new_lease_owner()
+
+    @property
+    def enabled(self) -> bool:
+        return self._log is not None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if not self._acquire_lock():
+            logger.warning(f"{self.directory} başka bir süreç tarafından kullanılıyor, checkpoint kapalı.")
+            return
+        self._read_snapshot()
+        replayed = self._replay_log()
+        if self._stale_tables:
+            self.blocks, self.tables_loaded = {}, False
+        if self.lease_owner is not None:
+            logger.info(f"Frontier checkpoint yüklendi: {len(self.pending)} bekleyen URL, "
+                        f"{sum(map(len, self.blocks.values()))} engelli host, "
+                        f"{replayed} log kaydı ({self.directory}).")
+        else:
+            self.lease_owner = new_lease_owner()
+        # Açılışta sıkıştırılır: sahip bilgisi kalıcı olur ve log boş başlar
+        self._write_snapshot()
+        self._log = open(self._path("frontier.log"), "w", encoding="utf-8")
+
+    def _acquire_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        self._lock_file = open(self._path("checkpoint.lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def _read_snapshot(self) -> None:
+        try:
+            with open(self._path("snapshot.json"), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Frontier snapshot okunamadı, log'dan devam ediliyor: {e}")
+            return
+        self.lease_owner = data.get("LEASE_OWNER")
+        self.pending = {url: [depth, rest[0] if rest else 0] for url, depth, *rest in data.get("PENDING", [])}
+        if data.get("VERSION") != SNAPSHOT_VERSION:
+            # Blok tablolarının biçimi değişmiş; bir kez Mongo'dan yeniden yüklenir
+            logger.info("Eski frontier snapshot'ı: blok tabloları Mongo'dan yeniden yüklenecek.")
+            self._stale_tables = True
+            return
+        self.tables_loaded = data.get("TABLES_LOADED", False)
+        self.blocks = data.get("BLOCKS", {})
+
+    def _replay_log(self) -> int:
+        replayed = 0
+        try:
+            with open(self._path("frontier.log"), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, IndexError, TypeError):
+                        logger.warning(f"Frontier log'u {replayed}. kayıttan sonra bozuk, kalanı atlandı.")
+                        break
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        return replayed
+
+    def _write_snapshot(self) -> None:
+        data = {
+            "VERSION": SNAPSHOT_VERSION,
+            "SAVED_AT": datetime.now().isoformat(),
+            "LEASE_OWNER": self.lease_owner,
+            "TABLES_LOADED": self.tables_loaded,
+            "PENDING": [[url, depth, priority] for url, (depth, priority) in self.pending.items()],
+            "BLOCKS": self.blocks,
+        }
+        tmp_path = self._path("snapshot.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path("snapshot.json"))
+
+    def _apply(self, entry: list) -> None:
+        op = entry[0]
+        if op == "q":
+            self.pending[entry[1]] = [entry[2], entry[3] if len(entry) > 3 else 0]
+        elif op == "d":
+            self.pending.pop(entry[1], None)
+        elif op == "hb":
+            table = self.blocks.setdefault(entry[1], {})
+            block = table.get(entry[2])
+            if block is None:
+                table[entry[2]] = [entry[3], {}]
+            else:
+                block[0] = entry[3]
+        elif op == "hu":
+            self.blocks.get(entry[1], {}).pop(entry[2], None)
+        elif op == "hp":
+            block = self.blocks.get(entry[1], {}).get(entry[2])
+            if block is not None:
+                block[1][entry[3]] = entry[4]
+        elif op in ("b", "u", "c", "cu", "i"):
+            pass  # URL bazlı eski blok kayıtları ve index sürümü (sürüm 1)
+        elif op == "l":
+            self.tables_loaded = True
+        else:
+            raise ValueError(op)
+
+    def _record(self, entry: list) -> None:
+        if self._log is None:
+            return
+        self._apply(entry)
+        self._log.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._entries += 1
+        if self._entries >= self.compact_every:
+            self.compact()
+
+    # --- Frontier olayları ---
+
+    def queued(self, url: str, depth: int, priority: int = 0) -> None:
+        self._record(["q", url, depth, priority])
+
+    def done(self, url: str) -> None:
+        if url in self.pending:
+            self._record(["d", url])
+
+    def host_blocked(self, kind: str, host: str, expires: float) -> None:
+        self._record(["hb", kind, host, expires])
+
+    def host_unblocked(self, kind: str, host: str) -> None:
+        if host in self.blocks.get(kind, {}):
+            self._record(["hu", kind, host])
+
+    def url_parked(self, kind: str, host: str, url: str, depth: int) -> None:
+        self._record(["hp", kind, host, url, depth])
+
+    def mark_tables_loaded(self) -> None:
+        self._record(["l"])
+
+    # --- Kalıcılık ---
+
+    def flush(self) -> None:
+        """ Log'u işletim sistemine bırakır; süreç çökse de yazılanlar kaybolmaz. """
+        if self._log is not None:
+            self._log.flush()
+
+    def compact(self) -> None:
+        if self._log is None:
+            return
+        self._log.flush()
+        self._write_snapshot()
+        self._log.seek(0)
+        self._log.truncate()
+        self._entries = 0
+
+    async def run(self, flush_seconds: float = 1.0) -> None:
+        try:
+            while True:
+                await asyncio.sleep(flush_seconds)
+                self.flush()
+        except asyncio.CancelledError:
+            pass
+
+    def close(self) -> None:
+        if self._log is None:
+            return
+        self.compact()
+        self._log.close()
+        self._log = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+frontier_checkpoint = FrontierCheckpoint()
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger("AsyncSpider")
+
+THROTTLE_STATUSES = (429, 503)
+
+
+class AdaptiveConcurrency:
+    """
+    Aktif fetch slotlarını AIMD ile ayarlar: her `interval` saniyede gözlenen gecikme,
+    hata/429 oranı ve event loop gecikmesi sınırların içindeyse ve slotlar doluysa limit
+    `increase` kadar artar; herhangi biri aşılırsa `decrease` katsayısıyla çarpılır.
+    Limit her zaman [min_limit, max_limit] aralığında kalır.
+    """
+
+    def __init__(self, initial: int = 15, min_limit: int = 4, max_limit: int = 120,
+                 target_latency: float = 8.0, max_error_rate: float = 0.3,
+                 max_throttle_rate: float = 0.05, max_loop_lag: float = 0.25,
+                 interval: float = 5.0, increase: int = 2, decrease: float = 0.7):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.max_throttle_rate = max_throttle_rate
+        self.max_loop_lag = max_loop_lag
+        self.interval = interval
+        self.increase = increase
+        self.decrease = decrease
+        self.in_flight = 0
+        self._peak_in_flight = 0
+        self._cond = asyncio.Condition()
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        self._latencies = []
+        self._errors = 0
+        self._throttled = 0
+        self._loop_lag = 0.0
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self.in_flight)
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def record(self, latency: float, status: int | None, error: str | None = None) -> None:
+        """ Bir fetch sonucunu pencereye ekler. """
+        self._latencies.append(latency)
+        if status in THROTTLE_STATUSES:
+            self._throttled += 1
+        elif error is not None or status is None or status >= 500:
+            self._errors += 1
+
+    def _adjust(self) -> None:
+        samples = len(self._latencies)
+        old = self.limit
+        reason = None
+        if self._loop_lag > self.max_loop_lag:
+            reason = f"loop lag {self._loop_lag * 1000:.0f}ms"
+        elif samples:
+            latencies = sorted(self._latencies)
+            p90 = latencies[int(samples * 0.9) - 1 if samples >= 10 else -1]
+            if self._throttled / samples > self.max_throttle_rate:
+                reason = f"429/503 oranı {self._throttled / samples:.0%}"
+            elif self._errors / samples > self.max_error_rate:
+                reason = f"hata oranı {self._errors / samples:.0%}"
+            elif p90 > self.target_latency:
+                reason = f"p90 gecikme {p90:.1f}s"
+
+        if reason is not None:
+            self.limit = max(self.min_limit, int(self.limit * self.decrease))
+        elif self._peak_in_flight >= self.limit:
+            # Yalnızca slotlar gerçekten dolduysa artır; boşta limit şişirilmez
+            self.limit = min(self.max_limit, self.limit + self.increase)
+
+        if self.limit != old:
+            logger.info(f"[CONCURRENCY] {old} -> {self.limit}" + (f" ({reason})" if reason else ""))
+        self._peak_in_flight = self.in_flight
+        self._reset_window()
+
+    async def run(self, lag_probe: float = 0.5) -> None:
+        """ Event loop gecikmesini ölçer ve periyodik olarak limiti ayarlar. """
+        loop = asyncio.get_running_loop()
+        elapsed = 0.0
+        try:
+            while True:
+                started = loop.time()
+                await asyncio.sleep(lag_probe)
+                actual = loop.time() - started
+                self._loop_lag = max(self._loop_lag, actual - lag_probe)
+                elapsed += actual
+                if elapsed >= self.interval:
+                    elapsed = 0.0
+                    self._adjust()
+                    async with self._cond:
+                        self._cond.notify_all()
+        except asyncio.CancelledError:
+            pass
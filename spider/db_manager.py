@@ -1,26 +1,69 @@
+import hashlib
 import logging
-from datetime import datetime, timedelta
+import os
+from datetime import datetime, timedelta, timezone
 import asyncio
-from urllib.parse import urlparse
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING
-from pymongo.errors import DuplicateKeyError, PyMongoError
+from pymongo import ASCENDING, DESCENDING, InsertOne, UpdateOne
+from pymongo.errors import PyMongoError
+from bulk_writer import BulkWriter
+from canonical import canonical_host, canonicalize
+from checkpoint import frontier_checkpoint
+from block_manager import BlockManager
+from priority import priority_scorer
+from seen_set import create_seen_set
 
 logger = logging.getLogger("AsyncSpider")
 
-MONGO_URI = "mongodb://localhost:27017"
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["HopeSearch"]
+MONGO_URI = os.getenv("SPIDER_MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB = os.getenv("SPIDER_MONGO_DB", "HopeSearch")
+
+
+def create_client(uri: str = MONGO_URI):
+    """ "mongomock://" sunucusuz deneme/benchmark içindir; mongomock-motor kurulu olmalıdır. """
+    if uri.startswith("mongomock://"):
+        from mongomock_motor import AsyncMongoMockClient
+        return AsyncMongoMockClient()
+    return AsyncIOMotorClient(uri)
+
+
+client = create_client()
+db = client[MONGO_DB]
+# Seen-set dosyasının hangi veritabanından doldurulduğu (URI parola içerebilir, özeti tutulur)
+SEEN_SOURCE = hashlib.blake2b(f"{MONGO_URI}/{MONGO_DB}".encode("utf-8"), digest_size=8).hexdigest()
 
 processed_collection = db["processed_sites"]
 botlinks_collection = db["botlinks"]
 queue_collection = db["queue_urls"]
 botChaptaBlock_collection = db["botChaptaBlock"]
+crawler_state_collection = db["crawler_state"]
+robots_collection = db["robots_cache"]
+validators_collection = db["page_validators"]
+duplicates_collection = db["duplicate_sites"]
+host_stats_collection = db["host_stats"]
+
+QUEUE_RECONCILE_STATE = "queue_reconcile"
+# Öncelik puanı için açılışta yüklenen en çok taranmış host sayısı
+HOST_STATS_LOAD_LIMIT = 100_000
 
-processed_set = set()
-bot_dict = {}
+# Write-behind tamponları: tekil insert/update yerine toplu bulk_write
+processed_writer = BulkWriter(processed_collection, max_batch=200)
+botlinks_writer = BulkWriter(botlinks_collection, max_batch=200, ordered=True)
+botChaptaBlock_writer = BulkWriter(botChaptaBlock_collection, max_batch=200, ordered=True)
+queue_writer = BulkWriter(queue_collection, max_batch=1000, max_pending=20000, ordered=True)
+robots_writer = BulkWriter(robots_collection, max_batch=200)
+validators_writer = BulkWriter(validators_collection, max_batch=500)
+duplicates_writer = BulkWriter(duplicates_collection, max_batch=200)
+host_stats_writer = BulkWriter(host_stats_collection, max_batch=500)
+WRITERS = (processed_writer, botlinks_writer, botChaptaBlock_writer, queue_writer, robots_writer,
+           validators_writer, duplicates_writer, host_stats_writer)
 
-bot_captcha_dict = {}
+# Bloom backend'inde olasılıksaldır; kesin karar için filter_unprocessed/is_processed kullanılır
+processed_set = create_seen_set()
+# Host bazlı engeller; engelli host'ların URL'leri istek atılmadan park edilir
+bot_blocks = BlockManager(botlinks_writer, "bot")
+captcha_blocks = BlockManager(botChaptaBlock_writer, "captcha")
 
 
 async def create_indexes():
@@ -28,103 +71,196 @@ async def create_indexes():
         await processed_collection.create_index([("url", ASCENDING)], unique=True)
         await botlinks_collection.create_index([("url", ASCENDING)], unique=True)
         await queue_collection.create_index([("url", ASCENDING)], unique=True)
+        await queue_collection.create_index([("lease_expires", ASCENDING)])
+        await queue_collection.create_index([("host_slot", ASCENDING), ("lease_expires", ASCENDING)])
+        await queue_collection.create_index([("lease_claim", ASCENDING)], sparse=True)
         await botChaptaBlock_collection.create_index([("url", ASCENDING)], unique=True)
+        await robots_collection.create_index([("host", ASCENDING)], unique=True)
+        await validators_collection.create_index([("url", ASCENDING)], unique=True)
+        await processed_collection.create_index([("simhash_bands", ASCENDING)], sparse=True)
+        await duplicates_collection.create_index([("url", ASCENDING)], unique=True)
+        await duplicates_collection.create_index([("canonical_url", ASCENDING)])
+        await queue_collection.create_index([("priority", DESCENDING), ("lease_expires", ASCENDING)])
+        await queue_collection.create_index([("host_slot", ASCENDING), ("priority", DESCENDING)])
+        await host_stats_collection.create_index([("host", ASCENDING)], unique=True)
+        await host_stats_collection.create_index([("fetched", DESCENDING)])
         logger.info("Indexes başarıyla oluşturuldu.")
     except PyMongoError:
         logger.error("Index oluşturma hatası:", exc_info=True)
 
-    
+
+async def seen_set_watermarks() -> dict | None:
+    """
+    Kalıcı seen-set bu veritabanından doldurulmuşsa koleksiyon başına son taranan _id'ler;
+    dosya başka bir veritabanına aitse ya da son taranan kayıt artık yoksa (koleksiyon
+    silinmiş) None.
+    """
+    meta = processed_set.meta
+    if processed_set.exact or meta.get("SOURCE") != SEEN_SOURCE:
+        return None
+    watermarks = {}
+    for collection in (processed_collection, duplicates_collection):
+        last_id = meta.get("WATERMARKS", {}).get(collection.name)
+        if last_id is not None:
+            last_id = ObjectId(last_id)
+            if await collection.find_one({"_id": last_id}, {"_id": 1}) is None:
+                return None
+        watermarks[collection.name] = last_id
+    return watermarks
+
+
+async def load_seen_set():
+    """ Seen-set'i yalnızca son açılıştan beri eklenen kayıtlarla tamamlar; uyuşmazlıkta baştan kurar. """
+    watermarks = await seen_set_watermarks()
+    if watermarks is None:
+        if len(processed_set):
+            logger.warning("Seen-set dosyası bu veritabanına ait değil ya da eskimiş, yeniden oluşturuluyor.")
+        processed_set.clear()
+        watermarks = {}
+    new_watermarks = {}
+    for collection in (processed_collection, duplicates_collection):
+        last_id = watermarks.get(collection.name)
+        query = {} if last_id is None else {"_id": {"$gt": last_id}}
+        async for doc in collection.find(query, {"_id": 1, "url": 1}).sort("_id", ASCENDING):
+            processed_set.add(canonicalize(doc["url"]))
+            last_id = doc["_id"]
+        new_watermarks[collection.name] = None if last_id is None else str(last_id)
+    processed_set.save_meta({"SOURCE": SEEN_SOURCE, "WATERMARKS": new_watermarks})
+
+
 async def load_existing_data():
     try:
-        async for doc in processed_collection.find({}, {"_id": 0, "url": 1}):
-            processed_set.add(doc["url"])
-        async for doc in botlinks_collection.find({}, {"_id": 0, "url": 1, "blocked_time": 1}):
-            bot_dict[doc["url"]] = doc["blocked_time"]
-        # İsteğe bağlı: CAPTCHA blok kayıtlarını da RAM'e yükleyebilirsiniz
-        async for doc in botChaptaBlock_collection.find({}, {"_id": 0, "url": 1, "blocked_time": 1}):
-            bot_captcha_dict[doc["url"]] = doc["blocked_time"]
-        logger.info("Mevcut veriler RAM'e yüklendi.")
+        await load_seen_set()
+        # Host verim geçmişi: yalnızca en çok taranmış host'lar, index üzerinden
+        cursor = host_stats_collection.find({}, {"_id": 0, "host": 1, "fetched": 1, "turkish": 1})
+        async for doc in cursor.sort("fetched", DESCENDING).limit(HOST_STATS_LOAD_LIMIT):
+            priority_scorer.host_yield.restore(doc["host"], doc.get("fetched", 0), doc.get("turkish", 0))
+        # Blok tabloları bir kez Mongo'dan okunur; sonraki açılışlarda checkpoint'ten gelir
+        await bot_blocks.load(botlinks_collection)
+        await captcha_blocks.load(botChaptaBlock_collection)
+        frontier_checkpoint.mark_tables_loaded()
+        logger.info(f"Mevcut veriler RAM'e yüklendi ({len(bot_blocks)} bot, {len(captcha_blocks)} CAPTCHA engeli).")
     except PyMongoError:
         logger.error("Veri yükleme hatası:", exc_info=True)
 
-async def remove_expired_block(url: str):
-    bot_dict.pop(url, None)
+async def filter_unprocessed(urls: list[str]) -> list[str]:
+    """
+    processed_sites'ta (ya da yakın kopya olarak duplicate_sites'ta) olmayan URL'leri
+    döner. Seen-set olasılıksal ise yalnızca muhtemel isabetler $in sorgusuyla Mongo'dan
+    doğrulanır. Karşılaştırma kanonik URL üzerinden yapılır.
+    """
+    misses = []
+    probable_hits = []
+    for url in urls:
+        if canonicalize(url) in processed_set:
+            probable_hits.append(url)
+        else:
+            misses.append(url)
+    if processed_set.exact or not probable_hits:
+        return misses
     try:
-        await botlinks_collection.delete_one({"url": url})
-        logger.info(f"Geçerliliğini yitirmiş bloklama kaldırıldı: {url}")
+        # Eski kayıtlar kanonikleştirilmeden yazılmış olabilir; iki biçim de aranır
+        candidates = {url: {url, canonicalize(url)} for url in probable_hits}
+        lookup = list(set().union(*candidates.values()))
+        found = set()
+        async for doc in processed_collection.find({"url": {"$in": lookup}}, {"_id": 0, "url": 1}):
+            found.add(doc["url"])
+        remaining = [u for u in lookup if u not in found]
+        if remaining:
+            async for doc in duplicates_collection.find({"url": {"$in": remaining}}, {"_id": 0, "url": 1}):
+                found.add(doc["url"])
     except PyMongoError:
-        logger.warning(f"{url} için engel kaldırılırken hata:", exc_info=True)
+        logger.warning("Seen-set doğrulaması yapılamadı, muhtemel isabetler atlanıyor:", exc_info=True)
+        return misses
+    unseen = set(misses)
+    unseen.update(url for url in probable_hits if not candidates[url] & found)
+    return [url for url in urls if url in unseen]
+
+async def is_processed(url: str) -> bool:
+    return not await filter_unprocessed([url])
+
+def is_blocked(url: str) -> bool:
+    """ URL'nin host'u bot ya da CAPTCHA nedeniyle engelliyse True (senkron, O(1)). """
+    return bot_blocks.is_blocked(url) or captcha_blocks.is_blocked(url)
 
 async def is_recently_blocked(url: str) -> bool:
-    if url not in bot_dict:
-        return False
-    blocked_time = bot_dict[url]
-    if (datetime.now() - blocked_time) < timedelta(minutes=30):
-        return True
-    await remove_expired_block(url)
-    return False
-
-async def mark_as_blocked(url: str):
-    now = datetime.now()
-    bot_dict[url] = now
-    try:
-        await botlinks_collection.insert_one({"url": url, "blocked_time": now})
-        logger.info(f"[BOTBLOCK] {url} 30 dakika boyunca engellendi.")
-    except DuplicateKeyError:
-        try:
-            await botlinks_collection.update_one({"url": url}, {"$set": {"blocked_time": now}})
-            bot_dict[url] = now
-            logger.info(f"[BOTBLOCK-UPDATE] {url} zaten engelliydi; zaman güncellendi.")
-        except PyMongoError:
-            logger.error(f"{url} için botblock güncellenirken hata:", exc_info=True)
-    except PyMongoError:
-        logger.error(f"{url} için botblock eklenirken hata:", exc_info=True)
+    return is_blocked(url)
+
+async def park_url(url: str, depth: int) -> int:
+    """
+    Host engelliyse URL'yi engel bitene kadar park eder. NOT_BLOCKED (0), PARKED ya da
+    host'un park kotası dolduysa PARK_FULL döner; PARK_FULL'da URL saklanmamıştır.
+    """
+    return await bot_blocks.park(url, depth) or await captcha_blocks.park(url, depth)
+
+def block_expires(url: str) -> float:
+    """ URL'nin host'undaki en geç engel bitişi (epoch); engel yoksa 0. """
+    return max(bot_blocks.expires(url), captcha_blocks.expires(url))
+
+async def mark_as_blocked(url: str, depth: int | None = None):
+    """ Host'u 30 dakika engeller; `depth` verilirse URL süre dolunca yeniden denenir. """
+    host = await bot_blocks.block(url, depth)
+    logger.info(f"[BOTBLOCK] {host} 30 dakika boyunca engellendi ({url}).")
+
+async def expire_blocks() -> list[tuple[str, int]]:
+    """ Süresi dolan bot/CAPTCHA engellerini kaldırır; park edilmiş (url, depth) listesini döner. """
+    return await bot_blocks.expire() + await captcha_blocks.expire()
 
     
 async def cleanup_queue_urls(interval_seconds: int = 30):
     while True:
-        try:
-            processed_set = set()
-            async for doc in processed_collection.find({}, {"_id": 0, "url": 1}):
-                processed_set.add(doc["url"])
-
-            if processed_set:
-                result = await queue_collection.delete_many({"url": {"$in": list(processed_set)}})
-                if result.deleted_count:
-                    logger.info(f"[QUEUE CLEANUP] {result.deleted_count} kayıt queue_urls'tan silindi (processed_sites ile çakışan).")
+        await partial_cleanup_queue_urls()
+        await asyncio.sleep(interval_seconds)
 
-        except Exception as e:
-            logger.error(f"[QUEUE CLEANUP ERROR] {type(e).__name__}: {e}", exc_info=True)
+async def partial_cleanup_queue_urls(batch_size: int = 10000, settle_seconds: int = 60) -> None:
+    """
+    processed_sites'a son çalışmadan beri eklenen kayıtları queue_urls'tan siler.
+    `_id` sırasıyla ilerler ve kalınan yer (watermark) crawler_state'e yazılır; her tur
+    yalnızca yeni kayıtlara dokunur. Farklı süreçlerin ürettiği ObjectId'ler tam sıralı
+    olmadığından son `settle_seconds` saniyede oluşturulanlar bir sonraki tura bırakılır.
+    """
+    try:
+        state = await crawler_state_collection.find_one({"_id": QUEUE_RECONCILE_STATE})
+        last_id = state.get("last_id") if state else None
+        upper = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=settle_seconds))
+    except PyMongoError as e:
+        logger.error(f"[CLEANUP ERROR] {type(e).__name__}: {e}", exc_info=True)
+        return
 
-        await asyncio.sleep(interval_seconds)
-        
-async def partial_cleanup_queue_urls(batch_size: int = 10000) -> None:
-    skip = 0
-    
+    total_deleted = 0
     while True:
         try:
+            id_filter = {"$lt": upper}
+            if last_id is not None:
+                id_filter["$gt"] = last_id
             urls_chunk = []
-            cursor = processed_collection.find({}, {"_id": 0, "url": 1}).skip(skip).limit(batch_size)
+            chunk_last_id = None
+            cursor = processed_collection.find({"_id": id_filter}, {"_id": 1, "url": 1}).sort("_id", ASCENDING).limit(batch_size)
             async for doc in cursor:
+                chunk_last_id = doc["_id"]
                 if "url" in doc:
                     urls_chunk.append(doc["url"])
 
-            if not urls_chunk:
-                logger.info("[CLEANUP] Tüm kayıtlar tarandı, işlem tamam.")
+            if chunk_last_id is None:
                 break
 
-            unique_urls = set(urls_chunk)
-            result = await queue_collection.delete_many({"url": {"$in": list(unique_urls)}})
+            if urls_chunk:
+                result = await queue_collection.delete_many({"url": {"$in": list(set(urls_chunk))}})
+                total_deleted += result.deleted_count
 
-            logger.info(
-                f"[CLEANUP] skip={skip}, chunk_size={len(unique_urls)}, "
-                f"deleted={result.deleted_count} kayit silindi."
+            last_id = chunk_last_id
+            await crawler_state_collection.update_one(
+                {"_id": QUEUE_RECONCILE_STATE},
+                {"$set": {"last_id": last_id, "updated_at": datetime.now()}},
+                upsert=True,
             )
-            skip += batch_size
 
         except PyMongoError as e:
             logger.error(f"[CLEANUP ERROR] {type(e).__name__}: {e}", exc_info=True)
             break
+
+    if total_deleted:
+        logger.info(f"[CLEANUP] {total_deleted} kayıt queue_urls'tan silindi (watermark={last_id}).")
         
 async def remove_url_from_queue_db(url: str) -> int:
     try:
@@ -138,43 +274,76 @@ async def remove_url_from_queue_db(url: str) -> int:
         return 0
     
 def get_domain(url: str) -> str:
-    """ URL'den domain'i çıkarır. """
-    parsed_url = urlparse(url)
-    return parsed_url.netloc.lower()
+    """ URL'den domain'i çıkarır (küçük harf, varsayılan port atılmış). """
+    return canonical_host(url)
 
 async def mark_as_chapta_blocked(url: str):
     """ CAPTCHA tespitinde, URL'nin domain'ini botChaptaBlock tablosuna ekler. """
-    domain = get_domain(url)
-    now = datetime.now()
-    bot_captcha_dict[domain] = now
-    try:
-        await botChaptaBlock_collection.insert_one({"url": domain, "blocked_time": now})
-        logger.info(f"[BOTCHAPTA BLOCK] {domain} captcha tespit edildi, 30 dakika boyunca engellendi.")
-    except DuplicateKeyError:
-        try:
-            await botChaptaBlock_collection.update_one({"url": domain}, {"$set": {"blocked_time": now}})
-            bot_captcha_dict[domain] = now
-            logger.info(f"[BOTCHAPTA BLOCK-UPDATE] {domain} zaten engelliydi; zaman güncellendi.")
-        except PyMongoError:
-            logger.error(f"{domain} için botChaptaBlock güncellenirken hata:", exc_info=True)
-    except PyMongoError:
-        logger.error(f"{domain} için botChaptaBlock eklenirken hata:", exc_info=True)
+    domain = await captcha_blocks.block(url)
+    logger.info(f"[BOTCHAPTA BLOCK] {domain} captcha tespit edildi, 30 dakika boyunca engellendi.")
 
 async def is_captcha_blocked(url: str) -> bool:
     """ URL'nin domain'i CAPTCHA nedeniyle engelliyse True döner. """
-    domain = get_domain(url)
-    if domain not in bot_captcha_dict:
-        return False
-    blocked_time = bot_captcha_dict[domain]
-    if (datetime.now() - blocked_time) < timedelta(minutes=30):
-        return True
-    await remove_expired_captcha_block(domain)
-    return False
-
-async def remove_expired_captcha_block(domain: str):
-    bot_captcha_dict.pop(domain, None)
+    return captcha_blocks.is_blocked(url)
+
+async def record_processed(doc: dict) -> None:
+    """ processed_sites kaydını toplu yazıcıya bırakır; seen-set hemen güncellenir. """
+    processed_set.add(canonicalize(doc["url"]))
+    await processed_writer.add(InsertOne(doc))
+
+async def record_duplicate(url: str, canonical_url: str, distance: int, simhash: int) -> None:
+    """ Yakın kopyayı processed_sites yerine kanonik sayfaya bağlı olarak kaydeder. """
+    processed_set.add(canonicalize(url))
+    await duplicates_writer.add(UpdateOne(
+        {"url": url},
+        {"$set": {
+            "canonical_url": canonical_url,
+            "distance": distance,
+            "simhash": simhash,
+            "found_at": datetime.now(),
+        }},
+        upsert=True,
+    ))
+
+async def load_validators(urls: list[str]) -> dict[str, dict]:
+    """ URL'lerin son ziyaretteki ETag / Last-Modified / içerik özetini tek sorguda getirir. """
+    validators = {}
+    if not urls:
+        return validators
     try:
-        await botChaptaBlock_collection.delete_one({"url": domain})
-        logger.info(f"Geçerliliğini yitirmiş captcha engelleme kaldırıldı: {domain}")
+        projection = {"_id": 0, "url": 1, "etag": 1, "last_modified": 1, "content_hash": 1, "depth": 1}
+        async for doc in validators_collection.find({"url": {"$in": urls}}, projection):
+            validators[doc.pop("url")] = doc
     except PyMongoError:
-        logger.warning(f"{domain} için captcha engelleme kaldırılırken hata:", exc_info=True)
+        logger.warning("page_validators okunamadı:", exc_info=True)
+    return validators
+
+async def record_validators(url: str, etag: str | None, last_modified: str | None,
+                            content_hash: str | None, depth: int, changed: bool) -> None:
+    """ Sayfanın doğrulayıcılarını bir sonraki koşullu istek için toplu yazıcıya bırakır. """
+    now = datetime.now()
+    fields = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "content_hash": content_hash,
+        "depth": depth,
+        "checked_at": now,
+    }
+    if changed:
+        fields["changed_at"] = now
+    await validators_writer.add(UpdateOne({"url": url}, {"$set": fields}, upsert=True))
+
+async def record_host_yield(url: str, turkish: bool) -> None:
+    """ Sayfanın dil sonucunu host'un verim geçmişine ekler (öncelik puanında kullanılır). """
+    host = canonical_host(url)
+    priority_scorer.host_yield.record(host, turkish)
+    await host_stats_writer.add(UpdateOne(
+        {"host": host},
+        {"$inc": {"fetched": 1, "turkish": int(turkish)}},
+        upsert=True,
+    ))
+
+async def close_writers() -> None:
+    """ Tüm write-behind tamponlarını boşaltır; kapanışta mutlaka çağrılmalıdır. """
+    for writer in WRITERS:
+        await writer.close()
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import socket
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+import metrics
+
+logger = logging.getLogger("AsyncSpider")
+
+DNS_TTL = 300            # başarılı çözümlemeler (sn)
+DNS_NEGATIVE_TTL = 120   # çözümlenemeyen / ölü host'lar (sn)
+DNS_CACHE_SIZE = 50000
+DNS_PREFETCH_CONCURRENCY = 32
+
+
+class CachingResolver(AbstractResolver):
+    """
+    aiohttp'nin varsayılan çözümleyicisini (aiodns kuruluysa AsyncResolver, değilse
+    ThreadedResolver) saran TTL ve boyut sınırlı DNS önbelleği. Aynı host için eşzamanlı
+    istekler tek bir sorguda birleştirilir; başarısız çözümlemeler de kısa süre saklanır.
+    Hem get_ip hem de aiohttp.TCPConnector aynı örneği kullanır.
+    """
+
+    def __init__(self, ttl: float = DNS_TTL, negative_ttl: float = DNS_NEGATIVE_TTL,
+                 max_size: int = DNS_CACHE_SIZE):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._resolver: AbstractResolver | None = None
+        self._cache: OrderedDict = OrderedDict()  # key -> (expires, results | (hata sınıfı, args))
+        self._inflight: dict = {}
+        self._prefetch_sem: asyncio.Semaphore | None = None
+        self._prefetch_tasks: set[asyncio.Task] = set()  # referans tutulmazsa görev GC ile kaybolabilir
+        self.hits = 0
+        self.misses = 0
+
+    def _inner(self) -> AbstractResolver:
+        # Alt çözümleyici çalışan event loop'a bağlandığı için ilk kullanımda oluşturulur
+        if self._resolver is None:
+            self._resolver = DefaultResolver()
+        return self._resolver
+
+    def _lookup(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _store(self, key, value, ttl: float) -> None:
+        self._cache[key] = (time.monotonic() + ttl, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    async def resolve(self, host: str, port: int = 0,
+                      family: socket.AddressFamily = socket.AF_UNSPEC) -> list[ResolveResult]:
+        # Önbellek port'tan bağımsızdır; sonuçlar istenen port ile döndürülür
+        results = await self._resolve_cached((host, family))
+        if port:
+            return [{**result, "port": port} for result in results]
+        return results
+
+    async def _resolve_cached(self, key) -> list[ResolveResult]:
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            if isinstance(entry[1], tuple):
+                # Her isabette yeni örnek: aynı istisnayı yeniden fırlatmak __traceback__'i büyütür
+                error_cls, args = entry[1]
+                raise error_cls(*args)
+            return entry[1]
+
+        self.misses += 1
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._resolve_and_store(key))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _resolve_and_store(self, key) -> list[ResolveResult]:
+        host, family = key
+        started = time.perf_counter()
+        try:
+            results = await self._inner().resolve(host, 0, family)
+        except OSError as e:
+            metrics.dns_seconds.observe(time.perf_counter() - started)
+            self._store(key, (type(e), e.args), self.negative_ttl)
+            raise
+        metrics.dns_seconds.observe(time.perf_counter() - started)
+        self._store(key, results, self.ttl)
+        return results
+
+    async def resolve_ip(self, host: str) -> str | None:
+        """ Host'un ilk IPv4 adresini (yoksa ilk adresini) döner; çözümlenemezse None. """
+        try:
+            results = await self.resolve(host)
+        except OSError:
+            return None
+        for result in results:
+            if result["family"] == socket.AF_INET:
+                return result["host"]
+        return results[0]["host"] if results else None
+
+    def prefetch(self, hosts: Iterable[str]) -> None:
+        """ Yakında istek atılacak host'ları arka planda çözümleyip önbelleğe alır. """
+        if self._prefetch_sem is None:
+            self._prefetch_sem = asyncio.Semaphore(DNS_PREFETCH_CONCURRENCY)
+        for host in set(hosts):
+            if not host or self._lookup((host, socket.AF_UNSPEC)) is not None:
+                continue
+            task = asyncio.ensure_future(self._prefetch_one(host))
+            self._prefetch_tasks.add(task)
+            task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _prefetch_one(self, host: str) -> None:
+        async with self._prefetch_sem:
+            await self.resolve_ip(host)
+
+    async def close(self) -> None:
+        pending = [*self._prefetch_tasks, *self._inflight.values()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if self._resolver is not None:
+            await self._resolver.close()
+            self._resolver = None
+
+
+dns_resolver = CachingResolver()
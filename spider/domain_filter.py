@@ -0,0 +1,93 @@
+import json
+import logging
+from typing import Iterable
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("AsyncSpider")
+
+EXCLUSION_RULES_PATH = "config/exclusion_rules.json"
+
+DEFAULT_BLOCKED_DOMAINS = [
+    f"{name}.{tld}"
+    for name in ("google", "youtube", "facebook", "twitter", "linkedin", "whatsapp")
+    for tld in ("com", "co.uk", "fr", "de")
+]
+DEFAULT_BLOCKED_EXTENSIONS = [
+    "pdf", "doc", "docx", "xls", "xlsx", "ppt", "pptx", "txt",
+    "jpg", "jpeg", "png", "gif", "bmp", "svg", "webp",
+    "mp4", "avi", "mkv", "mov", "wmv", "flv", "webm",
+    "mp3", "wav", "aac", "flac", "ogg",
+    "zip", "rar", "7z", "tar", "gz",
+]
+
+_TERMINAL = ""
+
+
+class ExclusionMatcher:
+    """
+    Engellenen domainler için ters çevrilmiş etiketlerden oluşan bir sonek ağacı
+    (com -> google -> www) ve dosya uzantıları için frozenset tutar. Kurulum bir
+    kez yapılır; her URL için yalnızca sözlük aramaları yapılır.
+    """
+
+    def __init__(self, domains: Iterable[str], extensions: Iterable[str]):
+        self._trie: dict = {}
+        for domain in domains:
+            self.add_domain(domain)
+        self.extensions = frozenset(ext.lower().lstrip(".") for ext in extensions)
+
+    def add_domain(self, domain: str) -> None:
+        node = self._trie
+        for label in reversed(domain.lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        node[_TERMINAL] = True
+
+    def is_blocked_host(self, host: str) -> bool:
+        """ host, engellenen bir domainin kendisi ya da alt domaini ise True döner. """
+        node = self._trie
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _TERMINAL in node:
+                return True
+        return False
+
+    def has_blocked_extension(self, path: str) -> bool:
+        last_segment = path.rsplit("/", 1)[-1]
+        _, dot, ext = last_segment.rpartition(".")
+        return bool(dot) and ext.lower() in self.extensions
+
+    def is_excluded(self, url: str) -> bool:
+        try:
+            parts = urlsplit(url)
+            host = parts.hostname or ""
+        except ValueError:
+            return True
+        return self.is_blocked_host(host) or self.has_blocked_extension(parts.path)
+
+    def filter_allowed(self, urls: Iterable[str]) -> list[str]:
+        """ Bir sayfadaki tüm linkleri tek çağrıda süzer, engellenmeyenleri sırasıyla döner. """
+        is_excluded = self.is_excluded
+        return [url for url in urls if not is_excluded(url)]
+
+    @classmethod
+    def from_config(cls, path: str = EXCLUSION_RULES_PATH) -> "ExclusionMatcher":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                data.get("BLOCKED_DOMAINS", DEFAULT_BLOCKED_DOMAINS),
+                data.get("BLOCKED_EXTENSIONS", DEFAULT_BLOCKED_EXTENSIONS),
+            )
+        except Exception as e:
+            logger.warning(f"{path} okunamadı, varsayılan engelleme kuralları kullanılıyor: {e}")
+            return cls(DEFAULT_BLOCKED_DOMAINS, DEFAULT_BLOCKED_EXTENSIONS)
+
+
+exclusion_matcher = ExclusionMatcher.from_config()
+
+
+def reload_exclusion_rules(path: str = EXCLUSION_RULES_PATH) -> None:
+    global exclusion_matcher
+    exclusion_matcher = ExclusionMatcher.from_config(path)
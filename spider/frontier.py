@@ -0,0 +1,319 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("AsyncSpider")
+
+# Host başına varsayılan nezaket ayarları
+DEFAULT_HOST_RATE = float(os.getenv("SPIDER_HOST_RATE", 1.0))    # saniyede istek
+DEFAULT_HOST_BURST = float(os.getenv("SPIDER_HOST_BURST", 2))    # art arda izin verilen istek
+MIN_HOST_RATE = 1 / 60         # 429/503 sonrası inilebilecek en düşük hız
+MAX_ITEMS_PER_HOST = 200       # tek host'un yerel kuyrukta tutabileceği URL sayısı
+THROTTLE_STATUSES = (429, 503)
+NUM_PRIORITIES = 16            # priority.NUM_PRIORITIES ile aynı
+
+
+def host_key(url: str) -> str:
+    """ Frontier'ın bölümleme anahtarı; db_manager.get_domain ile aynı (netloc, küçük harf). """
+    try:
+        return urlsplit(url).netloc.lower()
+    except ValueError:
+        return ""
+
+
+class TokenBucket:
+    """ Host başına hız sınırı: `rate` token/sn dolar, en fazla `burst` token birikir. """
+
+    def __init__(self, rate: float = DEFAULT_HOST_RATE, burst: float = DEFAULT_HOST_BURST):
+        self.rate = rate
+        self.base_rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.not_before = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        """ Bir sonraki isteğe izin verilecek monotonic zaman. """
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(now + wait, self.not_before)
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+class PriorityDeque:
+    """ Tek host'un öncelik kovalarına ayrılmış alt kuyruğu; en yüksek kovadan FIFO okunur. """
+
+    __slots__ = ("_buckets", "_size", "top")
+
+    def __init__(self):
+        self._buckets: dict[int, deque] = {}
+        self._size = 0
+        self.top = -1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, item, priority: int) -> None:
+        bucket = self._buckets.get(priority)
+        if bucket is None:
+            bucket = self._buckets[priority] = deque()
+        bucket.append(item)
+        self._size += 1
+        if priority > self.top:
+            self.top = priority
+
+    def peek(self):
+        return self._buckets[self.top][0]
+
+    def popleft(self):
+        bucket = self._buckets[self.top]
+        item = bucket.popleft()
+        self._size -= 1
+        if not bucket:
+            del self._buckets[self.top]
+            self.top = max(self._buckets, default=-1)
+        return item
+
+
+class HostFrontier:
+    """
+    Host'lara bölünmüş, öncelikli yerel tarama kuyruğu. Her host'un öncelik kovalarına
+    ayrılmış kendi alt kuyruğu ve token bucket'ı vardır. Token'ı henüz dolmamış host'lar
+    hazır olma zamanına göre sıralı bir heap'te bekler; zamanı gelenler en yüksek
+    öncelikli URL'lerinin kovasına (`_ready`) geçer ve worker'lara önce yüksek kovadaki
+    host'lar verilir. asyncio.Queue ile aynı temel arayüzü sunar (put/get/put_nowait/
+    get_nowait/empty/full/qsize/task_done); öğeler (url, depth), öncelik ayrı verilir.
+    """
+
+    def __init__(self, maxsize: int = 2000, host_rate: float = DEFAULT_HOST_RATE,
+                 host_burst: float = DEFAULT_HOST_BURST, max_items_per_host: int = MAX_ITEMS_PER_HOST,
+                 num_priorities: int = NUM_PRIORITIES):
+        self.maxsize = maxsize
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.max_items_per_host = max_items_per_host
+        self.num_priorities = num_priorities
+        self._queues: dict[str, PriorityDeque] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._scheduled: dict[str, float] = {}     # heap'te bekleyen host -> hazır olma zamanı
+        self._ready = [deque() for _ in range(num_priorities)]
+        self._ready_level: dict[str, int] = {}     # hazır kovadaki host -> kova
+        self._counter = itertools.count()
+        self._size = 0
+        self._queued: dict[str, int] = {}      # url -> kuyruktaki canlı kopya sayısı
+        self._tombstones: dict[str, int] = {}  # url -> atlanacak eski kopya sayısı
+        self._changed = asyncio.Event()
+
+    # --- asyncio.Queue uyumlu arayüz ---
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= self._size
+
+    def task_done(self) -> None:
+        pass
+
+    def host_full(self, url: str) -> bool:
+        queue = self._queues.get(host_key(url))
+        return queue is not None and len(queue) >= self.max_items_per_host
+
+    def put_nowait(self, item: tuple[str, int], priority: int = 0) -> None:
+        if self.full():
+            raise asyncio.QueueFull
+        priority = min(self.num_priorities - 1, max(0, priority))
+        host = host_key(item[0])
+        queue = self._queues.get(host)
+        if queue is None:
+            queue = self._queues[host] = PriorityDeque()
+        queue.append(item, priority)
+        self._size += 1
+        self._queued[item[0]] = self._queued.get(item[0], 0) + 1
+        level = self._ready_level.get(host)
+        if level is not None:
+            if priority > level:
+                self._make_ready(host, queue)  # daha yüksek kovaya taşınır
+        elif host not in self._scheduled:
+            self._schedule(host, time.monotonic())
+        self._changed.set()
+
+    async def put(self, item: tuple[str, int], priority: int = 0) -> None:
+        while self.full():
+            self._changed.clear()
+            await self._changed.wait()
+        self.put_nowait(item, priority)
+
+    def get_nowait(self) -> tuple[str, int]:
+        item = self._pop_ready(time.monotonic())
+        if item is None:
+            raise asyncio.QueueEmpty
+        return item
+
+    async def get(self) -> tuple[str, int]:
+        while True:
+            now = time.monotonic()
+            item = self._pop_ready(now)
+            if item is not None:
+                return item
+            timeout = max(0.0, self._heap[0][0] - now) if self._heap else None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def urls(self):
+        """ Kuyrukta bekleyen (iptal edilmemiş) tüm URL'ler. """
+        return iter(list(self._queued))
+
+    def discard(self, url: str) -> int:
+        """
+        URL'yi O(1) sürede iptal eder: kopyaları kuyrukta kalır ama mezar taşı (tombstone)
+        ile işaretlenir ve get sırasında token harcanmadan atlanır.
+        """
+        count = self._queued.pop(url, 0)
+        if count:
+            self._tombstones[url] = self._tombstones.get(url, 0) + count
+            self._size -= count
+        return count
+
+    def _skip_tombstoned(self, queue: PriorityDeque) -> None:
+        tombstones = self._tombstones
+        while queue and queue.peek()[0] in tombstones:
+            url = queue.popleft()[0]
+            tombstones[url] -= 1
+            if not tombstones[url]:
+                del tombstones[url]
+
+    # --- Nezaket / zamanlama ---
+
+    def has_ready(self) -> bool:
+        """ Şu an istek atılabilecek en az bir host varsa True. """
+        if self._size == 0:
+            return False
+        return bool(self._ready_level) or (bool(self._heap) and self._heap[0][0] <= time.monotonic())
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return bucket
+
+    def _schedule(self, host: str, now: float) -> None:
+        self._ready_level.pop(host, None)
+        ready = self._bucket(host).ready_at(now)
+        self._scheduled[host] = ready
+        heapq.heappush(self._heap, (ready, next(self._counter), host))
+
+    def _make_ready(self, host: str, queue: PriorityDeque) -> None:
+        self._scheduled.pop(host, None)
+        self._ready_level[host] = queue.top
+        self._ready[queue.top].append(host)
+
+    def _promote_due(self, now: float) -> None:
+        """ Token zamanı gelen host'ları heap'ten en yüksek URL önceliklerinin kovasına taşır. """
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            ready, _, host = heapq.heappop(heap)
+            if self._scheduled.get(host) != ready:
+                continue  # gecikme değişti, host yeni zamanıyla heap'te
+            queue = self._queues.get(host)
+            if queue:
+                self._skip_tombstoned(queue)
+            if not queue:
+                del self._scheduled[host]
+                self._queues.pop(host, None)
+                continue
+            self._make_ready(host, queue)
+
+    def _pop_ready(self, now: float) -> tuple[str, int] | None:
+        self._promote_due(now)
+        for level in range(self.num_priorities - 1, -1, -1):
+            hosts = self._ready[level]
+            while hosts:
+                host = hosts.popleft()
+                if self._ready_level.get(host) != level:
+                    continue  # başka kovaya taşındı ya da yeniden zamanlandı
+                del self._ready_level[host]
+                queue = self._queues.get(host)
+                if queue:
+                    self._skip_tombstoned(queue)
+                if not queue:
+                    self._queues.pop(host, None)
+                    continue
+                bucket = self._bucket(host)
+                if bucket.ready_at(now) > now:
+                    self._schedule(host, now)  # hazır beklerken yavaşlatıldı
+                    continue
+                bucket.consume(now)
+                item = queue.popleft()
+                self._size -= 1
+                remaining = self._queued.get(item[0], 0) - 1
+                if remaining > 0:
+                    self._queued[item[0]] = remaining
+                else:
+                    self._queued.pop(item[0], None)
+                self._skip_tombstoned(queue)
+                if queue:
+                    self._schedule(host, now)
+                else:
+                    del self._queues[host]
+                self._changed.set()
+                return item
+        return None
+
+    def _reschedule(self, host: str) -> None:
+        if host in self._scheduled or host in self._ready_level:
+            self._schedule(host, time.monotonic())
+            self._changed.set()
+
+    def set_host_delay(self, host: str, delay: float) -> None:
+        """ İki istek arasında en az `delay` saniye bırakılmasını sağlar (ör. Crawl-delay). """
+        if delay <= 0:
+            return
+        bucket = self._bucket(host)
+        if bucket.burst == 1 and bucket.base_rate <= 1 / delay:
+            return  # zaten en az bu kadar yavaş
+        bucket.rate = bucket.base_rate = min(bucket.base_rate, 1 / delay)
+        bucket.burst = 1
+        bucket.tokens = min(bucket.tokens, 1)
+        self._reschedule(host)
+
+    def record_response(self, url: str, status: int | None) -> None:
+        """
+        Yanıtı host'un hızına yansıtır: 429/503'te hız yarıya iner ve host bir süre
+        bekletilir; başarılı yanıtlarda hız yavaşça varsayılana döner.
+        """
+        host = host_key(url)
+        bucket = self._bucket(host)
+        if status in THROTTLE_STATUSES:
+            bucket.rate = max(MIN_HOST_RATE, bucket.rate / 2)
+            bucket.tokens = 0
+            bucket.not_before = time.monotonic() + 1 / bucket.rate
+            self._reschedule(host)
+            logger.debug(f"[POLITENESS] {host} yavaşlatıldı: {bucket.rate:.3f} istek/sn")
+        elif status is not None and status < 400 and bucket.rate < bucket.base_rate:
+            bucket.rate = min(bucket.base_rate, bucket.rate * 1.1)
+
+    def forget_idle_hosts(self) -> None:
+        """ Kuyruğu boş, yavaşlatılmamış ve özel gecikmesi olmayan host'ların bucket'larını bırakır. """
+        for host in [h for h, b in self._buckets.items()
+                     if h not in self._queues and b.rate >= b.base_rate >= self.host_rate]:
+            del self._buckets[host]
@@ -1,49 +1,34 @@
 import asyncio
+import hashlib
 import json
 import logging
+import multiprocessing
+import os
 import random
 import re
-from langdetect import detect
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable
 import chardet
-from urllib.parse import urlparse
 from aiohttp import ClientSession, ClientError
 from bs4 import BeautifulSoup
+import domain_filter
+from link_extractor import extract_links
+from simhash import simhash64
+from turkish_detector import turkish_detector
+import metrics
 
 
 logger = logging.getLogger("AsyncSpider")
 
-import re
-from urllib.parse import urlparse
-
 def is_excluded_domain(url: str) -> bool:
-    parsed_url = urlparse(url)
-    domain = parsed_url.netloc.lower()
-    path = parsed_url.path.lower()
-
-    excluded_patterns = [
-        r".*\.?google\.(com|co\.uk|fr|de)$",
-        r".*\.?youtube\.(com|co\.uk|fr|de)$",
-        r".*\.?facebook\.(com|co\.uk|fr|de)$",
-        r".*\.?twitter\.(com|co\.uk|fr|de)$",
-        r".*\.?linkedin\.(com|co\.uk|fr|de)$",
-        r".*\.?whatsapp\.(com|co\.uk|fr|de)$"
-    ]
-
-    excluded_extensions = [
-        r"\.(pdf|doc|docx|xls|xlsx|ppt|pptx|txt|jpg|jpeg|png|gif|bmp|svg|webp|mp4|avi|mkv|mov|wmv|flv|webm|mp3|wav|aac|flac|ogg|zip|rar|7z|tar|gz)$"
-    ]
-
-    # Domain bazlı engelleme
-    for pattern in excluded_patterns:
-        if re.match(pattern, domain):
-            return True
+    return domain_filter.exclusion_matcher.is_excluded(url)
 
-    # Dosya uzantısı bazlı engelleme
-    for ext_pattern in excluded_extensions:
-        if re.search(ext_pattern, path): 
-            return True
 
-    return False
+def filter_excluded(urls: Iterable[str]) -> list[str]:
+    """ Engellenen domain/uzantıya sahip linkleri toplu olarak ayıklar. """
+    return domain_filter.exclusion_matcher.filter_allowed(urls)
 
 
 def load_user_agents() -> list[str]:
@@ -62,107 +47,312 @@ def get_random_user_agent() -> str:
         return "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
     return random.choice(USER_AGENTS)
 
-import logging
-import chardet
-from bs4 import BeautifulSoup
-from aiohttp import ClientSession
-from langdetect import detect
+BLOCK_STATUSES = (401, 403, 429, 503)
+TEXT_PREFIX_CHARS = 3000
+TURKISH_RATIO_THRESHOLD = 0.3
 
-logger = logging.getLogger("AsyncSpider")
+# Gövde parça parça okunur; sınırı aşan kısım indirilmez (sıkıştırma açıldıktan sonraki bayt)
+MAX_PAGE_BYTES = int(os.getenv("SPIDER_MAX_PAGE_BYTES", 2 * 1024 * 1024))
+# fetch_turkce yalnızca ilk TEXT_PREFIX_CHARS karakteri inceler; işaretleme payıyla okunan önek
+TURKCE_PREFIX_BYTES = int(os.getenv("SPIDER_TURKCE_PREFIX_BYTES", 64 * 1024))
+READ_CHUNK_BYTES = 64 * 1024
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
 
-async def fetch_turkce(session: ClientSession, url: str, max_retries: int = 2) -> bool:
 
-    if not url.startswith(("http://", "https://")):
-        url = "http://" + url
-    try:
-        async with session.get(url, timeout=10, ssl=False) as resp:
-            raw_data = await resp.read()
-            encoding = chardet.detect(raw_data)["encoding"] or "utf-8"
-            html_text = raw_data.decode(encoding, errors="replace")
+@dataclass
+class ParsedPage:
+    """ Ham HTML baytlarından çıkarılan sonuç: çözülmüş metin, linkler, dil oranı, captcha. """
+    encoding: str
+    text: str
+    links: list[str] = field(default_factory=list)
+    turkish_ratio: float = 0.0
+    captcha: bool = False
+    simhash: int | None = None
+    timings: dict[str, float] = field(default_factory=dict)
 
-            clean_text = BeautifulSoup(html_text, "html.parser").get_text(separator=" ", strip=True)
-            clean_text = clean_text[:3000]  
 
-            words = clean_text.split()
-            if len(words) < 20:  
-                return False
+@dataclass
+class FetchResult:
+    """ Tek bir indirmenin sonucu. `links` None ise sayfa engelli/başarısız sayılır. """
+    url: str
+    status: int | None = None
+    links: list[str] | None = None
+    is_turkish: bool = False
+    turkish_ratio: float = 0.0
+    captcha: bool = False
+    encoding: str | None = None
+    text: str = ""
+    error: str | None = None
+    download_time: float = 0.0
+    parse_time: float = 0.0
+    etag: str | None = None
+    last_modified: str | None = None
+    content_hash: str | None = None
+    not_modified: bool = False
+    simhash: int | None = None
+    rejected: str | None = None
+    truncated: bool = False
 
-            # **Kelime bazlı değil, paragraf bazlı kontrol yapıyoruz!**
-            paragraphs = clean_text.split(". ")  
+    @property
+    def ok(self) -> bool:
+        return self.links is not None or self.not_modified
 
-            turkish_count = 0
-            total_checked = 0
+    @property
+    def total_time(self) -> float:
+        return self.download_time + self.parse_time
 
-            for paragraph in paragraphs:
-                if len(paragraph) > 10:  
-                    try:
-                        detected_lang = detect(paragraph)
-                        if detected_lang == "tr":
-                            turkish_count += 1
-                        total_checked += 1
-                    except Exception as e:
-                        logger.warning(f"LangDetect hata verdi (görmezden geliniyor): {e}")
 
-            if total_checked == 0:
-                return False 
+def turkish_ratio(clean_text: str) -> float:
+    """ Metindeki cümlelerin Türkçe sınıflanan oranını döner (n-gram profili, tek geçiş). """
+    return turkish_detector.turkish_ratio(clean_text, TURKISH_RATIO_THRESHOLD)
 
-            turkish_ratio = turkish_count / total_checked
 
-            return turkish_ratio >= 0.3
+# g-recaptcha ve hcaptcha "captcha" alt dizgisini içerir
+CAPTCHA_HINTS = (b"captcha", b"data-sitekey")
+_CAPTCHA_ATTR_RE = re.compile("captcha", re.I)
 
-    except Exception as e:
-        logger.warning(f"Dil kontrol hatası: {url} -> {type(e).__name__}: {e}")
-        return False
-    
-def contains_captcha(soup):
+
+def captcha_hint(raw_data: bytes) -> bool:
+    """
+    DOM kurmadan ham baytlarda captcha izi arar (büyük/küçük harf duyarsız). Hiçbiri
+    geçmiyorsa contains_captcha da bir şey bulamaz; yalnızca isabette DOM'a bakılır.
+    """
+    lowered = raw_data.lower()
+    return any(hint in lowered for hint in CAPTCHA_HINTS)
+
+
+def contains_captcha(soup) -> bool:
+    """ DOM doğrulaması (tek geçiş): class/id'de captcha, data-sitekey'li input. """
     body = soup.body if soup.body else soup
-    
-    indicators = [
-        body.find(lambda tag: tag.has_attr("class") and any(re.search("captcha", cls, re.I) for cls in tag.get("class", []))),
-        body.find(lambda tag: tag.has_attr("id") and re.search("captcha", tag.get("id", ""), re.I)),
-        body.find("div", {"class": re.compile("g-recaptcha", re.I)}),
-        body.find("input", {"data-sitekey": True})
-    ]
-    
-    return any(indicators)
+    for tag in body.find_all(True):
+        attrs = tag.attrs
+        if "class" in attrs and any(_CAPTCHA_ATTR_RE.search(cls) for cls in attrs["class"]):
+            return True
+        if "id" in attrs and _CAPTCHA_ATTR_RE.search(attrs["id"]):
+            return True
+        if tag.name == "input" and "data-sitekey" in attrs:
+            return True
+    return False
 
 
-async def fetch(session: ClientSession, url: str, max_retries: int = 2) -> list[str] | None:
+def parse_page(raw_data: bytes, base_url: str) -> ParsedPage:
+    """
+    Sayfayı tek seferde çözer ve ayrıştırır; captcha varsa dil kontrolü yapılmaz.
+    Aşama süreleri `timings` içinde döner (ayrı süreçte çalışabildiği için metrikler
+    çağıran tarafta kaydedilir).
+    """
+    timings = {}
+    clock = time.perf_counter()
+
+    def lap(stage: str) -> None:
+        nonlocal clock
+        now = time.perf_counter()
+        timings[stage] = now - clock
+        clock = now
+
+    encoding = chardet.detect(raw_data)["encoding"] or "utf-8"
+    text = raw_data.decode(encoding, errors="replace")
+    lap("decode")
+
+    soup = BeautifulSoup(text, "html.parser")
+    lap("parse")
+    # Sayfaların neredeyse hiçbirinde captcha yoktur: DOM yalnızca bayt taraması isabet ederse gezilir
+    captcha = captcha_hint(raw_data) and contains_captcha(soup)
+    lap("captcha")
+    if captcha:
+        return ParsedPage(encoding=encoding, text=text, captcha=True, timings=timings)
+
+    # Link keşfi DOM yerine ham baytlar üzerinden yapılır (göreli linkler de çözülür)
+    links = extract_links(raw_data, base_url, encoding)
+    lap("links")
+
+    full_text = soup.get_text(separator=" ", strip=True)
+    ratio = turkish_ratio(full_text[:TEXT_PREFIX_CHARS])
+    lap("language")
+    # Yakın kopya parmak izi yalnızca saklanacak (Türkçe) sayfalar için hesaplanır
+    fingerprint = None
+    if ratio >= TURKISH_RATIO_THRESHOLD:
+        fingerprint = simhash64(full_text)
+        lap("simhash")
+    return ParsedPage(
+        encoding=encoding,
+        text=text,
+        links=links,
+        turkish_ratio=ratio,
+        simhash=fingerprint,
+        timings=timings,
+    )
+
+
+# Ayrıştırma havuzu: 0 → event loop üzerinde çalış, None → CPU sayısı kadar süreç
+PARSE_WORKERS = int(os.getenv("SPIDER_PARSE_WORKERS", os.cpu_count() or 1))
+
+_parse_executor: ProcessPoolExecutor | None = None
+
+
+def configure_parse_executor(max_workers: int | None = PARSE_WORKERS) -> None:
+    """ chardet/BeautifulSoup/dil tespiti işini ayrı süreçlere taşıyan havuzu kurar. """
+    global _parse_executor
+    shutdown_parse_executor()
+    if max_workers == 0:
+        logger.info("Ayrıştırma event loop üzerinde yapılacak (parse_workers=0).")
+        return
+    # Motor/pymongo arka plan thread'leri yüzünden fork yerine spawn kullanılır
+    _parse_executor = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    logger.info(f"Ayrıştırma havuzu başlatıldı: {_parse_executor._max_workers} süreç.")
+
+
+def shutdown_parse_executor() -> None:
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
+
+
+async def run_parse(raw_data: bytes, base_url: str) -> ParsedPage:
+    """ parse_page'i havuz varsa ayrı süreçte, yoksa doğrudan çalıştırır. """
+    if _parse_executor is None:
+        return parse_page(raw_data, base_url)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_parse_executor, parse_page, raw_data, base_url)
+
+
+def content_hash(raw_data: bytes) -> str:
+    return hashlib.blake2b(raw_data, digest_size=16).hexdigest()
+
+
+def conditional_headers(validators: dict | None) -> dict:
+    """ Önceki ziyaretten kalan ETag / Last-Modified değerlerinden koşullu istek başlıkları. """
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def is_html_content_type(content_type: str | None) -> bool:
+    """ Başlık yoksa içerik HTML sayılır; aksi halde yalnızca HTML/XHTML kabul edilir. """
+    if not content_type:
+        return True
+    return content_type.split(";", 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+async def read_body(resp, max_bytes: int) -> tuple[bytes, bool]:
+    """ Gövdeyi parça parça en fazla `max_bytes` okur; (veri, kesildi_mi) döner. """
+    body = bytearray()
+    async for chunk in resp.content.iter_chunked(READ_CHUNK_BYTES):
+        body += chunk
+        if len(body) >= max_bytes:
+            # Kalan gövde okunmaz; bağlantı havuza dönmek yerine kapatılır
+            return bytes(body[:max_bytes]), True
+    return bytes(body), False
+
+
+async def fetch_page(session: ClientSession, url: str, max_retries: int = 2,
+                     validators: dict | None = None, max_bytes: int = MAX_PAGE_BYTES) -> FetchResult:
+    """
+    Sayfayı bir kez indirir; linkleri, Türkçe kararını, durum kodunu ve süreleri
+    tek bir FetchResult içinde döner. `validators` (etag, last_modified, content_hash)
+    verilirse istek koşullu yapılır; 304 ya da aynı içerik özeti `not_modified` olarak
+    döner ve sayfa yeniden ayrıştırılmaz. HTML olmayan yanıtlar gövde okunmadan
+    `rejected` ile döner; gövdenin yalnızca ilk `max_bytes` baytı işlenir.
+    """
     if not url.startswith("http"):
         url = "http://" + url
+    result = FetchResult(url=url)
     if is_excluded_domain(url):
         logger.info(f"[BLOCK] {url} -> Domain engellendi.")
-        return None
-    headers = {"User-Agent": get_random_user_agent()}
+        result.error = "excluded"
+        return result
+    validators = validators or {}
+    headers = {"User-Agent": get_random_user_agent(), **conditional_headers(validators)}
     attempt = 0
     while attempt < max_retries:
+        started = time.perf_counter()
         try:
             async with session.get(url, headers=headers, timeout=20, ssl=False) as resp:
-                if resp.status in (401, 403, 429, 503):
-                    return None
-
-                raw_data = await resp.read()  
-                detected_encoding = chardet.detect(raw_data)["encoding"] or "utf-8"
-                text = raw_data.decode(detected_encoding, errors="replace")
-                
-                soup = BeautifulSoup(text, "html.parser")
-                if contains_captcha(soup):
-                    from db_manager import mark_as_chapta_blocked
-                    await mark_as_chapta_blocked(url)
-                    return None
-
-                links = []
-                for a_tag in soup.find_all("a", href=True):
-                    href = a_tag["href"].strip()
-                    if href.startswith("http"):
-                        links.append(href)
-                return links
+                result.status = resp.status
+                result.error = None  # önceki denemenin ağ hatası bu yanıtın sonucunu etkilemez
+                metrics.responses_total.inc(status=resp.status)
+                if resp.status in BLOCK_STATUSES:
+                    result.download_time = time.perf_counter() - started
+                    return result
+
+                # 304 yanıtında başlık gelmeyebilir; önceki değerler geçerli kalır
+                result.etag = resp.headers.get("ETag") or validators.get("etag")
+                result.last_modified = resp.headers.get("Last-Modified") or validators.get("last_modified")
+                if resp.status == 304:
+                    result.download_time = time.perf_counter() - started
+                    result.content_hash = validators.get("content_hash")
+                    result.not_modified = True
+                    return result
+
+                if not is_html_content_type(resp.headers.get("Content-Type")):
+                    result.download_time = time.perf_counter() - started
+                    result.rejected = "content-type"
+                    logger.debug(f"[SKIP] {url} -> HTML değil ({resp.headers.get('Content-Type')})")
+                    return result
+
+                raw_data, result.truncated = await read_body(resp, max_bytes)
+                base_url = str(resp.url)
+                result.download_time = time.perf_counter() - started
+            metrics.download_seconds.observe(result.download_time)
+            metrics.page_bytes.observe(len(raw_data))
+            metrics.bytes_total.inc(len(raw_data))
+
+            # Doğrulayıcı desteklemeyen sunucularda değişiklik içerik özetiyle anlaşılır
+            result.content_hash = content_hash(raw_data)
+            if result.content_hash == validators.get("content_hash"):
+                result.not_modified = True
+                return result
+
+            parse_started = time.perf_counter()
+            page = await run_parse(raw_data, base_url)
+            result.parse_time = time.perf_counter() - parse_started
+            metrics.observe_stages(page.timings)
+            # Ayrıştırma havuzunda sıra bekleme ve süreçler arası aktarım
+            metrics.stage_seconds.observe(max(0.0, result.parse_time - sum(page.timings.values())),
+                                          stage="pool_wait")
+
+            result.encoding = page.encoding
+            result.text = page.text
+            if page.captcha:
+                from db_manager import mark_as_chapta_blocked
+                result.captcha = True
+                await mark_as_chapta_blocked(url)
+                return result
+
+            result.links = page.links
+            result.turkish_ratio = page.turkish_ratio
+            result.simhash = page.simhash
+            result.is_turkish = page.turkish_ratio >= TURKISH_RATIO_THRESHOLD
+            return result
 
         except (ClientError, asyncio.TimeoutError) as e:
             attempt += 1
+            result.error = type(e).__name__
+            metrics.fetch_errors_total.inc(error=result.error)
             if attempt < max_retries:
                 await asyncio.sleep(random.uniform(0.05, 0.015))
         except Exception as e:
             logger.error(f"[ERROR] {url} -> {e}", exc_info=True)
-            return None
-    return None
+            result.error = type(e).__name__
+            return result
+    return result
+
+
+async def fetch_turkce(session: ClientSession, url: str, max_retries: int = 2,
+                       prefix_bytes: int = TURKCE_PREFIX_BYTES) -> bool:
+    """ Dil kararı için yalnızca sayfanın ilk `prefix_bytes` baytı indirilir. """
+    result = await fetch_page(session, url, max_retries=max_retries, max_bytes=prefix_bytes)
+    return result.is_turkish
+
+
+async def fetch(session: ClientSession, url: str, max_retries: int = 2) -> list[str] | None:
+    result = await fetch_page(session, url, max_retries=max_retries)
+    return result.links
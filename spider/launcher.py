@@ -0,0 +1,119 @@
+"""
+Çok süreçli, shard'lı tarayıcı başlatıcısı.
+
+Her süreç tutarlı hash halkasında kendisine düşen host'ların URL'lerini queue_urls'tan
+kiralar; kendi yerel kuyruğunu, engel tablolarını ve seen-set dosyasını tutar, Mongo'yu
+diğer shard'larla paylaşır. Ana süreç shard'lardan gelen sayaçları toplayıp raporlar.
+
+Kullanım:
+    python launcher.py --shards 4 --seeds search_results.txt --seed-count 10
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import time
+
+from seeds import get_initial_sites
+
+logger = logging.getLogger("AsyncSpider")
+
+
+def run_shard(shard_id: int, num_shards: int, initial_sites: list[str], progress_queue,
+              concurrency: int, max_concurrency: int, parse_workers: int) -> None:
+    # Seen-set ve frontier checkpoint dosyaları shard başına ayrıdır; main import edilmeden önce ayarlanmalı
+    base_path = os.getenv("SPIDER_SEEN_PATH", "data/seen")
+    os.environ["SPIDER_SEEN_PATH"] = os.path.join(base_path, f"shard_{shard_id:02d}")
+    checkpoint_path = os.getenv("SPIDER_CHECKPOINT_PATH", "data/frontier")
+    if checkpoint_path:
+        os.environ["SPIDER_CHECKPOINT_PATH"] = os.path.join(checkpoint_path, f"shard_{shard_id:02d}")
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s [%(levelname)s] %(name)s[shard-{shard_id}] - %(message)s"
+    )
+    import asyncio
+    from main import async_spider
+    asyncio.run(async_spider(
+        initial_sites,
+        concurrency=concurrency,
+        max_concurrency=max_concurrency,
+        parse_workers=parse_workers,
+        shard_id=shard_id,
+        num_shards=num_shards,
+        progress_queue=progress_queue,
+    ))
+
+
+def report(latest: dict[int, dict], started: float) -> None:
+    totals = {"fetched": 0, "turkish": 0, "failed": 0, "unchanged": 0, "duplicate": 0, "local_queue": 0, "concurrency": 0}
+    for stats in latest.values():
+        for key in totals:
+            totals[key] += stats.get(key, 0)
+    elapsed = max(time.time() - started, 1e-9)
+    logger.info(
+        f"[PROGRESS] {len(latest)} shard, indirilen={totals['fetched']} "
+        f"({totals['fetched'] / elapsed:.1f} sayfa/sn), Türkçe={totals['turkish']}, "
+        f"başarısız={totals['failed']}, değişmemiş={totals['unchanged']}, "
+        f"yakın kopya={totals['duplicate']}, "
+        f"yerel kuyruk={totals['local_queue']}, aktif slot={totals['concurrency']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shard'lı çok süreçli tarayıcı")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seeds", default="search_results.txt")
+    parser.add_argument("--seed-count", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=15, help="Shard başına başlangıç slot sayısı")
+    parser.add_argument("--max-concurrency", type=int, default=120, help="Shard başına en fazla slot")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="Shard başına ayrıştırma süreci (0: shard kendi sürecinde ayrıştırır)")
+    parser.add_argument("--report-interval", type=int, default=30)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s[launcher] - %(message)s"
+    )
+    initial_sites = get_initial_sites(args.seeds, args.seed_count)
+
+    ctx = multiprocessing.get_context("spawn")
+    progress_queue = ctx.Queue()
+    processes = []
+    for shard_id in range(args.shards):
+        # Başlangıç siteleri paylaşılan kuyruğa bir kez eklensin diye yalnızca shard 0'a verilir
+        seeds = initial_sites if shard_id == 0 else []
+        process = ctx.Process(
+            target=run_shard,
+            args=(shard_id, args.shards, seeds, progress_queue,
+                  args.concurrency, args.max_concurrency, args.parse_workers),
+            name=f"spider-shard-{shard_id}",
+        )
+        process.start()
+        processes.append(process)
+    logger.info(f"{args.shards} shard başlatıldı.")
+
+    latest: dict[int, dict] = {}
+    started = time.time()
+    next_report = started + args.report_interval
+    try:
+        while any(p.is_alive() for p in processes):
+            try:
+                stats = progress_queue.get(timeout=1)
+                latest[stats["shard"]] = stats
+            except queue.Empty:
+                pass
+            if time.time() >= next_report:
+                report(latest, started)
+                next_report += args.report_interval
+    except KeyboardInterrupt:
+        logger.info("Durduruluyor, shard'ların kapanması bekleniyor...")
+    finally:
+        for process in processes:
+            process.join()
+    report(latest, started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import html
+import re
+from urllib.parse import urljoin, urlsplit
+
+# Tek geçişte yorumları ve <script>/<style> bloklarını atlayıp <a> ve <base> etiketlerini yakalar;
+# tırnaklı öznitelik değerleri içindeki ">" etiketi bitirmez
+_SCAN_RE = re.compile(
+    rb"<!--.*?-->"
+    rb"|<script\b.*?</script\s*>"
+    rb"|<style\b.*?</style\s*>"
+    rb"""|<(a|base)\b((?:"[^"]*"|'[^']*'|[^'">])*)>""",
+    re.I | re.S,
+)
+# data-href, xlink:href gibi öznitelikler eşleşmez
+_HREF_RE = re.compile(rb"""(?<![\w:-])href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.I)
+
+SKIPPED_SCHEMES = ("javascript:", "mailto:", "tel:", "data:", "ftp:", "sms:")
+
+
+def _href_value(attrs: bytes, encoding: str) -> str | None:
+    match = _HREF_RE.search(attrs)
+    if match is None:
+        return None
+    raw = match.group(1)
+    if raw is None:
+        raw = match.group(2)
+    if raw is None:
+        raw = match.group(3)
+    return html.unescape(raw.decode(encoding, errors="replace")).strip()
+
+
+def extract_links(raw_data: bytes, base_url: str, encoding: str = "utf-8") -> list[str]:
+    """
+    Ham HTML baytlarını DOM ağacı kurmadan tarar ve <a href> değerlerini döner.
+    Göreli linkler sayfadaki ilk <base href> (yoksa base_url) üzerinden mutlak
+    hale getirilir; yalnızca http/https linkler, sayfa içi sırasıyla ve tekrarsız döner.
+    """
+    base = base_url
+    base_seen = False
+    links = {}
+    for match in _SCAN_RE.finditer(raw_data):
+        tag = match.group(1)
+        if tag is None:
+            continue
+        href = _href_value(match.group(2), encoding)
+        if not href:
+            continue
+        if tag.lower() == b"base":
+            if not base_seen:
+                base = urljoin(base_url, href)
+                base_seen = True
+            continue
+        if href.startswith("#") or href.lower().startswith(SKIPPED_SCHEMES):
+            continue
+        try:
+            absolute = urljoin(base, href)
+            scheme = urlsplit(absolute).scheme
+        except ValueError:
+            continue
+        if scheme in ("http", "https"):
+            links[absolute] = None
+    return list(links)
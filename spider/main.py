@@ -1,44 +1,76 @@
 import logging
-import socket
 import time
 import asyncio
-from datetime import datetime
 from urllib.parse import urlparse
 from db_manager import (
     create_indexes,
-    get_domain,
     load_existing_data,
     partial_cleanup_queue_urls,
     processed_set,
+    filter_unprocessed,
     mark_as_blocked,
-    is_recently_blocked,
+    park_url,
+    expire_blocks,
+    bot_blocks,
+    captcha_blocks,
     processed_collection,
-    remove_url_from_queue_db
+    record_processed,
+    record_duplicate,
+    record_validators,
+    record_host_yield,
+    close_writers,
+    queue_collection,
+    WRITERS,
 )
 from queue_manager import (
     local_queue,
     refill_local_queue,
     enqueue_url_batch,
+    ack_url,
+    defer_url,
+    hold_blocked,
+    remove_url,
+    release_urls,
+    renew_leases,
+    pop_validators,
+    restore_local_queue,
 )
-from http_client import fetch, fetch_turkce, is_excluded_domain
-from pymongo.errors import DuplicateKeyError, PyMongoError
+from block_manager import PARKED
+from http_client import (
+    BLOCK_STATUSES,
+    PARSE_WORKERS,
+    configure_parse_executor,
+    fetch_page,
+    filter_excluded,
+    is_excluded_domain,
+    shutdown_parse_executor,
+)
+from dns_cache import dns_resolver
+from robots import RobotsCache
+from concurrency import AdaptiveConcurrency
+from near_duplicate import NearDuplicateIndex
+from canonical import canonicalize_many
+import metrics
+from checkpoint import frontier_checkpoint
+from simhash import band_keys, to_int64
+from seeds import get_initial_sites
 
 logger = logging.getLogger("AsyncSpider")
 
-async def unblocker(interval_seconds: int = 60):
-    from db_manager import bot_dict, remove_expired_block
-    from queue_manager import enqueue_url
+async def unblocker(interval_seconds: int):
+    """
+    Süresi dolan host engellerini kaldırır ve park edilmiş URL'leri tek toplu yazımla
+    kuyruğa geri verir. Süre sonları heap'te tutulduğu için tur başına maliyet, yalnızca
+    süresi dolan engel sayısı kadardır.
+    """
     try:
         while True:
             await asyncio.sleep(interval_seconds)
-            now = datetime.now()
-            expired = [u for u, t in bot_dict.items() if (now - t).total_seconds() > 1800]
-            if expired:
-                for url in expired:
-                    await remove_expired_block(url)
-                    if url not in processed_set:
-                        #logger.info(f"[UNBLOCK] {url} blok süresi doldu, DB kuyruğuna eklendi.")
-                        await enqueue_url(url,0)
+            parked = await expire_blocks()
+            if parked:
+                fresh = set(await filter_unprocessed([url for url, _ in parked]))
+                await enqueue_url_batch([url_depth for url_depth in parked if url_depth[0] in fresh])
+                logger.info(f"[UNBLOCK] Engeli biten host'lardan {len(fresh)} URL kuyruğa geri alındı.")
     except asyncio.CancelledError:
         logger.info("Unblocker sonlandırılıyor.")
     except Exception as e:
@@ -179,23 +211,12 @@ async def async_spider(initial_sites: list[str], concurrency: int = 15):
 '''
 
 async def remove_from_queues(url: str) -> None:
-
-    deleted_count = await remove_url_from_queue_db(url)
-
-    temp_list = []
-    while not local_queue.empty():
-        try:
-            item = local_queue.get_nowait()  # (url, depth) gibi bir tuple
-            if item[0] != url:
-                temp_list.append(item)
-        except asyncio.QueueEmpty:
-            break
-    for elem in temp_list:
-        local_queue.put_nowait(elem)
+    await remove_url(url)
 
 async def get_ip(url: str) -> str | None:
     """
     URL içindeki domain'i alarak asenkron şekilde IP adresini çözümler.
+    Sonuç, HTTP bağlantılarıyla paylaşılan DNS önbelleğinden gelir.
     """
     try:
         parsed = urlparse(url)
@@ -203,16 +224,25 @@ async def get_ip(url: str) -> str | None:
         if not domain:
             return None  # Geçersiz URL
 
-        return await asyncio.to_thread(socket.gethostbyname, domain)
-    except (socket.gaierror, ValueError, TypeError) as e:
+        return await dns_resolver.resolve_ip(domain)
+    except (ValueError, TypeError) as e:
         return None  # Çözümlenemeyen domain
     
 MAX_FOREIGN_DEPTH = 2  # Yabancı siteler için maksimum dallanma derinliği
 
-async def worker(session, worker_id: int, idle_limit: int = 3):
+# robots.txt kuralları; Crawl-delay doğrudan host zamanlayıcısına uygulanır
+robots_cache = RobotsCache(on_crawl_delay=local_queue.set_host_delay)
+
+# İlerleme sayaçları; çok süreçli çalışmada launcher shard'ların değerlerini toplar
+crawl_stats = {"fetched": 0, "turkish": 0, "failed": 0, "unchanged": 0, "duplicate": 0}
+
+# Aynı içeriğin aynaları, yazdırma sürümleri ve izleme parametreli varyantları için
+near_duplicates = NearDuplicateIndex()
+
+async def worker(session, worker_id: int, controller: AdaptiveConcurrency, idle_limit: int = 3):
     idle_count = 0
     while True:
-        if local_queue.empty():
+        if not local_queue.has_ready():
             await refill_local_queue(batch_size=200)
             if local_queue.empty():
                 idle_count += 1
@@ -224,116 +254,267 @@ async def worker(session, worker_id: int, idle_limit: int = 3):
             else:
                 idle_count = 0
 
-        url, depth = await local_queue.get()
-        local_queue.task_done()
-
-        if is_excluded_domain(url):
+        try:
+            # Hazır host yoksa en fazla birkaç saniye beklenir, sonra kuyruk yeniden doldurulur
+            url, depth = await asyncio.wait_for(local_queue.get(), timeout=5)
+        except asyncio.TimeoutError:
             continue
+        local_queue.task_done()
 
-        links = await fetch(session, url)
-        if links is None:
-            from db_manager import is_captcha_blocked
-            if await is_captcha_blocked(url):
-                continue
-            else:
-                await mark_as_blocked(url)
-                continue
-
-        # Dil kontrolü
-        is_turkce = await fetch_turkce(session, url)
-
-        if is_turkce:
+        held = False
+        try:
+            held = await process_url(session, worker_id, controller, url, depth)
+        except Exception:
+            # Tek URL'deki beklenmedik hata worker'ı (ve taramayı) durdurmaz
+            crawl_stats["failed"] += 1
+            logger.exception(f"Worker-{worker_id} -> {url} işlenirken hata.")
+        finally:
+            # Kira, sonuç ne olursa olsun kapatılır (engelli host için bekletilenler hariç);
+            # çökmede süresi dolunca geri alınır
+            if not held:
+                await ack_url(url)
+
+async def process_url(session, worker_id: int, controller: AdaptiveConcurrency,
+                      url: str, depth: int) -> bool:
+    """ URL engelli host'u için bekletildiyse (bkz. hold_blocked) True döner; kira kapatılmamalıdır. """
+    if is_excluded_domain(url):
+        return False
+    if await hold_blocked(url, depth):
+        return True  # host engelli: istek atılmaz, engel bitince kuyruğa geri döner
+    if not await robots_cache.allowed(session, url):
+        retry_at = robots_cache.retry_at(url)
+        if retry_at is not None:
+            # robots.txt sunucu hatası verdi: yasak geçicidir, URL kuyrukta bekler
+            await defer_url(url, retry_at)
+            return True
+        logger.debug(f"[ROBOTS] Worker-{worker_id} -> {url} robots.txt ile yasaklı, atlandı.")
+        return False
+
+    # Tek indirme: linkler ve dil kararı aynı yanıttan çıkarılır
+    validators = pop_validators(url, depth)
+    async with controller.slot():
+        result = await fetch_page(session, url, validators=validators)
+    controller.record(result.total_time, result.status, result.error)
+    local_queue.record_response(url, result.status)
+    crawl_stats["fetched"] += 1
+    if result.rejected:
+        # HTML olmayan içerik: engelleme sayılmaz, URL yalnızca kuyruktan düşer
+        await remove_from_queues(url)
+        return False
+    if not result.ok:
+        crawl_stats["failed"] += 1
+        if result.captcha:
+            # Host'u http_client CAPTCHA tablosuna aldı; URL engel bitince yeniden denenir
+            return await hold_blocked(url, depth)
+        if result.status in BLOCK_STATUSES:
+            await mark_as_blocked(url)
+            return await hold_blocked(url, depth)
+        # Ağ hatası/zaman aşımı: fetch_page zaten yeniden denedi; host engellenmez,
+        # yalnızca bu URL kuyruktan düşer
+        logger.debug(f"[FAILED] Worker-{worker_id} -> {url} ({result.error})")
+        return False
+    if result.not_modified:
+        # Sayfa son ziyaretten beri değişmedi: linkleri o zaman kuyruğa alındı
+        crawl_stats["unchanged"] += 1
+        await record_validators(url, result.etag, result.last_modified, result.content_hash,
+                                (validators or {}).get("depth", depth), changed=False)
+        logger.debug(f"[UNCHANGED] Worker-{worker_id} -> {url} (status={result.status})")
+        return False
+    await record_validators(url, result.etag, result.last_modified, result.content_hash,
+                            depth, changed=True)
+    links = result.links
+    await record_host_yield(url, result.is_turkish)
+
+    if result.is_turkish:
+        duplicate_of = None
+        if result.simhash is not None:
+            duplicate_of = await near_duplicates.find_canonical(url, result.simhash)
+        if duplicate_of is not None:
+            # Kopya ayrıca saklanmaz/etiketlenmez; linkleri kanonik sayfadan zaten alındı
+            canonical_url, distance = duplicate_of
+            crawl_stats["duplicate"] += 1
             await remove_from_queues(url)
-            server_ip = await get_ip(url)
-
-            try:
-                await processed_collection.insert_one({
-                    "url": url,
-                    "server_ip": server_ip 
-                })
-                logger.info(f"[INSERT-TR] Worker-{worker_id} -> {url}, IP={server_ip}")
-            except DuplicateKeyError:
-                pass
-            except PyMongoError:
-                logger.error(f"processed_sites eklenirken hata: {url} ->", exc_info=True)
-
-            next_depth = 0
-        else:
-            if depth >= MAX_FOREIGN_DEPTH:
-                await remove_from_queues(url)
-                continue
-            next_depth = depth + 1
-
-        new_urls = []
-        for link in links:
-            if link not in processed_set and not await is_recently_blocked(link):
-                new_urls.append((link, next_depth))
-        if new_urls:
-            await enqueue_url_batch(new_urls)
+            await record_duplicate(url, canonical_url, distance, to_int64(result.simhash))
+            logger.info(f"[DUPLICATE] Worker-{worker_id} -> {url} ~ {canonical_url} (mesafe={distance})")
+            return False
+
+        crawl_stats["turkish"] += 1
+        await remove_from_queues(url)
+        server_ip = await get_ip(url)
+
+        doc = {
+            "url": url,
+            "server_ip": server_ip,
+            "etag": result.etag,
+            "last_modified": result.last_modified,
+            "content_hash": result.content_hash,
+        }
+        if result.simhash is not None:
+            doc["simhash"] = to_int64(result.simhash)
+            doc["simhash_bands"] = band_keys(result.simhash)
+        await record_processed(doc)
+        logger.info(f"[INSERT-TR] Worker-{worker_id} -> {url}, IP={server_ip}")
+
+        next_depth = 0
+    else:
+        if depth >= MAX_FOREIGN_DEPTH:
+            await remove_from_queues(url)
+            return False
+        next_depth = depth + 1
+
+    new_urls = []
+    # Seen-set ve kuyruk kanonik URL'ler üzerinden çalışır (fragment, utm_*, oturum vb. atılır)
+    links = robots_cache.filter_allowed(filter_excluded(canonicalize_many(links)))
+    for link in await filter_unprocessed(links):
+        # Park kotası dolu host'ların linkleri queue_urls'ta bekler (bkz. hold_blocked)
+        if await park_url(link, next_depth) != PARKED:
+            new_urls.append((link, next_depth))
+    if new_urls:
+        await enqueue_url_batch(new_urls, parent_ratio=result.turkish_ratio)
+    return False
 
 async def schedule_partial_cleanup(interval_seconds: int = 100, batch_size: int = 10000):
     while True:
         await partial_cleanup_queue_urls(batch_size=batch_size)
         await asyncio.sleep(interval_seconds)
 
-async def async_spider(initial_sites: list[str], concurrency: int = 25):
+async def report_progress(progress_queue, shard_id: int, controller: AdaptiveConcurrency,
+                          interval_seconds: int = 10) -> None:
+    """ Shard'ın sayaçlarını launcher'a periyodik olarak gönderir. """
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            progress_queue.put({
+                "shard": shard_id,
+                **crawl_stats,
+                "local_queue": local_queue.qsize(),
+                "concurrency": controller.limit,
+            })
+    except asyncio.CancelledError:
+        pass
+
+def register_crawl_metrics(controller: AdaptiveConcurrency) -> None:
+    """ Başka modüllerde tutulan durumları /metrics'e okuma fonksiyonlarıyla bağlar. """
+    registry = metrics.REGISTRY
+    for name, help_text in (("fetched", "İndirilen sayfalar"), ("turkish", "Kaydedilen Türkçe sayfalar"),
+                            ("failed", "Başarısız/engelli indirmeler"), ("unchanged", "Değişmemiş (304) sayfalar"),
+                            ("duplicate", "Yakın kopya sayfalar")):
+        registry.gauge(f"spider_pages_{name}_total", help_text, lambda n=name: crawl_stats[n], kind="counter")
+    registry.gauge("spider_local_queue_depth", "Yerel kuyruktaki URL sayısı", local_queue.qsize)
+    registry.gauge("spider_queue_db_depth", "queue_urls tahmini kayıt sayısı (periyodik)")
+    registry.gauge("spider_concurrency_limit", "AIMD aktif slot sınırı", lambda: controller.limit)
+    registry.gauge("spider_in_flight", "Süren indirme sayısı", lambda: controller.in_flight)
+    registry.gauge("spider_write_buffer_ops", "Mongo tamponlarında bekleyen işlemler",
+                   lambda: sum(writer.pending() for writer in WRITERS))
+    registry.gauge("spider_blocked_hosts", "Bot/CAPTCHA nedeniyle engelli host'lar",
+                   lambda: len(bot_blocks) + len(captcha_blocks))
+    registry.gauge("spider_parked_urls", "Engel bitimini bekleyen URL'ler",
+                   lambda: bot_blocks.parked_count() + captcha_blocks.parked_count())
+    registry.gauge("spider_dns_cache_hits_total", "DNS önbellek isabetleri",
+                   lambda: dns_resolver.hits, kind="counter")
+    registry.gauge("spider_dns_cache_misses_total", "DNS önbellek kaçırmaları",
+                   lambda: dns_resolver.misses, kind="counter")
+
+async def refresh_queue_depth() -> None:
+    depth = await queue_collection.estimated_document_count()
+    metrics.REGISTRY.gauge("spider_queue_db_depth", "").set(depth)
+
+async def async_spider(initial_sites: list[str], concurrency: int = 25,
+                       parse_workers: int | None = PARSE_WORKERS,
+                       min_concurrency: int = 4, max_concurrency: int = 120,
+                       shard_id: int = 0, num_shards: int = 1, progress_queue=None,
+                       metrics_port: int = metrics.METRICS_PORT, idle_limit: int = 13):
+    """
+    `concurrency` başlangıçtaki aktif fetch slotu sayısıdır; AdaptiveConcurrency bunu
+    gözlenen gecikme, hata/429 oranı ve event loop gecikmesine göre
+    [min_concurrency, max_concurrency] aralığında ayarlar. `num_shards` > 1 ise süreç
+    yalnızca kendi host shard'ının URL'lerini kiralar (bkz. launcher.py). Metrikler
+    `metrics_port + shard_id` üzerinde /metrics olarak yayınlanır (0: kapalı). Tüm
+    worker'lar `idle_limit` boş turdan (tur başına ~5 sn) sonra durduğunda tarama biter.
+    """
     import aiohttp
-    from queue_manager import enqueue_url
-    await create_indexes()
-    await load_existing_data()
-    for site in initial_sites:
-        if site not in processed_set and not await is_recently_blocked(site):
-            await enqueue_url((site, 0))
-    connector = aiohttp.TCPConnector(limit=80, limit_per_host=30)
-    async with aiohttp.ClientSession(connector=connector) as session:
-        ub_task = asyncio.create_task(unblocker(interval_seconds=60))
-        cleanup_task = asyncio.create_task(schedule_partial_cleanup(
-            interval_seconds=100,
-            batch_size=10000
-        ))
-        workers = []
-        for i in range(concurrency):
-            w = asyncio.create_task(worker(session, worker_id=i, idle_limit=13))
-            workers.append(w)
-        start_time = time.time()
-        done, pending = await asyncio.wait(
-            [ub_task, cleanup_task, *workers],
-            return_when=asyncio.FIRST_EXCEPTION
-        )
-        for t in pending:
-            t.cancel()
+    from queue_manager import configure_shard, enqueue_url
+    configure_parse_executor(parse_workers)
+    configure_shard(shard_id, num_shards)
+    initial_sites = canonicalize_many(
+        site if site.startswith(("http://", "https://")) else "http://" + site
+        for site in initial_sites
+    )
+    metrics_runner = None
+    try:
+        if metrics_port:
+            metrics_runner = await metrics.start_metrics_server(metrics_port + shard_id)
+        await create_indexes()
+        await load_existing_data()
+        # Çökme/yeniden başlatma öncesi kiralanmış URL'ler kira süresi beklenmeden devam eder
+        await restore_local_queue()
+        for site in await filter_unprocessed(initial_sites):
+            if await park_url(site, 0) != PARKED:
+                await enqueue_url((site, 0))
+        # DNS önbelleği get_ip ile paylaşıldığı için aiohttp'nin kendi önbelleği kapatılır
+        connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=30,
+                                         resolver=dns_resolver, use_dns_cache=False)
+        async with aiohttp.ClientSession(connector=connector,
+                                         trace_configs=[metrics.connection_trace_config()]) as session:
+            ub_task = asyncio.create_task(unblocker(interval_seconds=5))
+            cleanup_task = asyncio.create_task(schedule_partial_cleanup(
+                interval_seconds=100,
+                batch_size=10000
+            ))
+            lease_task = asyncio.create_task(renew_leases())
+            controller = AdaptiveConcurrency(initial=concurrency, min_limit=min_concurrency,
+                                             max_limit=max_concurrency)
+            controller_task = asyncio.create_task(controller.run())
+            register_crawl_metrics(controller)
+            metrics_task = asyncio.create_task(metrics.report_metrics(refresh=refresh_queue_depth))
+            checkpoint_task = asyncio.create_task(frontier_checkpoint.run())
+            background = [lease_task, controller_task, metrics_task, checkpoint_task]
+            if progress_queue is not None:
+                background.append(asyncio.create_task(
+                    report_progress(progress_queue, shard_id, controller)
+                ))
+            # Worker sayısı üst sınır kadardır; aynı anda kaçının fetch yapacağını controller belirler
+            workers = []
+            for i in range(max_concurrency):
+                w = asyncio.create_task(worker(session, worker_id=i, controller=controller, idle_limit=idle_limit))
+                workers.append(w)
+            start_time = time.time()
+            # Unblocker ve temizlik görevleri hiç bitmez; tarama worker'lar durunca biter
+            done, pending = await asyncio.wait(workers, return_when=asyncio.FIRST_EXCEPTION)
+            for t in done:
+                if not t.cancelled() and t.exception() is not None:
+                    logger.error("Worker hata ile durdu.", exc_info=t.exception())
+            for t in pending:
+                t.cancel()
+                try:
+                    await t
+                except asyncio.CancelledError:
+                    pass
+            ub_task.cancel()
             try:
-                await t
+                await ub_task
             except asyncio.CancelledError:
-                pass
-        ub_task.cancel()
-        try:
-            await ub_task
-        except asyncio.CancelledError:
-            logger.info("Unblocker iptal edildi.")
-
-        elapsed = time.time() - start_time
-        total_count = await processed_collection.count_documents({})
-        logger.info(f"[DONE] Tarama bitti. Süre: {elapsed:.2f}s, Toplam işlenen: {total_count}")
-
+                logger.info("Unblocker iptal edildi.")
+            for t in (cleanup_task, *background):
+                t.cancel()
+            await asyncio.gather(cleanup_task, *background, return_exceptions=True)
+            # İşlenmeden kalan URL'lerin kirası bırakılır, diğer süreçler devralabilir
+            await release_urls(list(local_queue.urls()))
+    finally:
+        # Hata ya da iptal durumunda da tamponlar boşaltılır ve havuz kapatılır
+        shutdown_parse_executor()
+        await dns_resolver.close()
+        await close_writers()
+        processed_set.close()
+        frontier_checkpoint.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+
+    logger.info(f"[METRICS] {metrics.summary()}")
+    elapsed = time.time() - start_time
+    total_count = await processed_collection.count_documents({})
+    logger.info(f"[DONE] Tarama bitti. Süre: {elapsed:.2f}s, Toplam işlenen: {total_count}")
 
-def get_initial_sites(filepath: str, count: int = 10) -> list[str]:
-    sites = []
-    try:
-        with open(filepath, 'r+', encoding='utf-8') as file:
-            for _ in range(count):
-                line = file.readline()
-                if not line:
-                    break
-                sites.append(line.strip())
-            remaining = file.readlines()
-            file.seek(0)
-            file.writelines(remaining)
-            file.truncate()
-        logger.info(f"{len(sites)} adet site okundu.")
-    except Exception as e:
-        logger.error(f"[FILE-ERROR]", exc_info=True)
-    return sites
 
 def main():
     import asyncio
@@ -0,0 +1,283 @@
+import asyncio
+import bisect
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+logger = logging.getLogger("AsyncSpider")
+
+# 0: uç nokta kapalı. Çok süreçli çalışmada shard'lar port + shard_id kullanır.
+METRICS_PORT = int(os.getenv("SPIDER_METRICS_PORT", 9108))
+METRICS_HOST = os.getenv("SPIDER_METRICS_HOST", "127.0.0.1")
+
+# Saniye cinsinden süre kovaları: 0.1 ms .. 60 s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 60.0,
+)
+SIZE_BUCKETS = tuple(1024 * 2 ** i for i in range(12))  # 1 KiB .. 2 MiB
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Counter:
+    """ Yalnızca artan sayaç; etiket başına ayrı değer tutar. """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name + _format_labels(key), value
+
+
+class Gauge:
+    """
+    Anlık değer; `fn` verilirse değer her okumada fonksiyondan alınır. Başka bir yerde
+    tutulan, yalnızca artan sayaçlar `kind="counter"` ile aynı şekilde yayınlanır.
+    """
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], float] | None = None,
+                 kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.kind = kind
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def value(self) -> float:
+        return self.fn() if self.fn is not None else self._value
+
+    def samples(self):
+        yield self.name, self.value()
+
+
+class Histogram:
+    """
+    Sabit kovalı histogram (Prometheus biçimi). `observe` yalnızca bir bisect ve iki
+    toplama yapar; yüzdelikler kovalardan doğrusal ara değerlemeyle tahmin edilir.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}  # key -> [kova sayıları..., +Inf, toplam]
+
+    def _get(self, key: tuple) -> list:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        return series
+
+    def observe(self, value: float, **labels) -> None:
+        series = self._get(_label_key(labels))
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def quantile(self, q: float, **labels) -> float:
+        series = self._series.get(_label_key(labels))
+        if not series:
+            return 0.0
+        counts = series[:-1]
+        rank = q * sum(counts)
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def label_sets(self) -> list[dict]:
+        return [dict(key) for key in self._series]
+
+    def samples(self):
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield self.name + "_bucket" + _format_labels(key, (("le", repr(bound)),)), cumulative
+            cumulative += series[len(self.buckets)]
+            yield self.name + "_bucket" + _format_labels(key, (("le", "+Inf"),)), cumulative
+            yield self.name + "_sum" + _format_labels(key), series[-1]
+            yield self.name + "_count" + _format_labels(key), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], float] | None = None,
+              kind: str = "gauge") -> Gauge:
+        gauge = self._register(Gauge(name, help_text, fn, kind))
+        if fn is not None:
+            # Yeniden kayıtta eski fonksiyon (ve yakaladığı nesneler) bırakılır
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        """ Prometheus metin biçimi (text/plain; version=0.0.4). """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Aşama süreleri (saniye)
+dns_seconds = REGISTRY.histogram("spider_dns_seconds", "Önbellekte olmayan DNS çözümleme süresi")
+connect_seconds = REGISTRY.histogram("spider_connect_seconds", "Yeni TCP/TLS bağlantısı kurma süresi")
+download_seconds = REGISTRY.histogram("spider_download_seconds", "İstekten gövdenin son baytına kadar geçen süre")
+stage_seconds = REGISTRY.histogram(
+    "spider_stage_seconds", "Ayrıştırma aşamaları: decode, parse, captcha, links, language, simhash, pool_wait"
+)
+mongo_write_seconds = REGISTRY.histogram("spider_mongo_write_seconds", "BulkWriter bulk_write süresi")
+refill_seconds = REGISTRY.histogram("spider_refill_seconds", "Yerel kuyruğu queue_urls'tan doldurma süresi")
+
+# Hacimler
+page_bytes = REGISTRY.histogram("spider_page_bytes", "İndirilen sayfa gövdesi boyutu", SIZE_BUCKETS)
+bytes_total = REGISTRY.counter("spider_bytes_total", "İndirilen toplam gövde baytı")
+responses_total = REGISTRY.counter("spider_responses_total", "HTTP yanıtları (durum koduna göre)")
+fetch_errors_total = REGISTRY.counter("spider_fetch_errors_total", "Ağ/zaman aşımı hataları (türe göre)")
+mongo_ops_total = REGISTRY.counter("spider_mongo_ops_total", "Toplu yazılan Mongo işlemleri")
+refill_urls_total = REGISTRY.counter("spider_refill_urls_total", "queue_urls'tan kiralanan URL'ler")
+
+
+def observe_stages(timings: dict[str, float]) -> None:
+    for stage, seconds in timings.items():
+        stage_seconds.observe(seconds, stage=stage)
+
+
+def summary() -> str:
+    """ Aşama başına p50/p99 ve sayaçlardan tek satırlık özet. """
+    parts = []
+    for histogram, label in ((dns_seconds, "dns"), (connect_seconds, "connect"),
+                             (download_seconds, "download"), (refill_seconds, "refill")):
+        if histogram.count():
+            parts.append(f"{label} p50={histogram.quantile(0.5) * 1000:.0f}ms "
+                         f"p99={histogram.quantile(0.99) * 1000:.0f}ms")
+    for labels in sorted(stage_seconds.label_sets(), key=lambda item: item["stage"]):
+        parts.append(f"{labels['stage']} p50={stage_seconds.quantile(0.5, **labels) * 1000:.1f}ms "
+                     f"p99={stage_seconds.quantile(0.99, **labels) * 1000:.1f}ms")
+    for labels in mongo_write_seconds.label_sets():
+        parts.append(f"mongo[{labels['collection']}] p50="
+                     f"{mongo_write_seconds.quantile(0.5, **labels) * 1000:.0f}ms")
+    parts.append(f"indirilen={bytes_total.total() / 1024 / 1024:.1f}MiB")
+    return ", ".join(parts)
+
+
+async def report_metrics(interval_seconds: int = 60,
+                         refresh: Callable[[], Awaitable[None]] | None = None) -> None:
+    """ Periyodik olarak aşama özetini loglar; `refresh` pahalı göstergeleri günceller. """
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            if refresh is not None:
+                try:
+                    await refresh()
+                except Exception:
+                    logger.debug("Metrik yenileme hatası:", exc_info=True)
+            logger.info(f"[METRICS] {summary()}")
+    except asyncio.CancelledError:
+        pass
+
+
+async def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """ /metrics uç noktasını başlatır; kapatmak için dönen runner'ın cleanup()'ı çağrılır. """
+    if not port:
+        return None
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(body=REGISTRY.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.warning(f"Metrik uç noktası açılamadı ({host}:{port}): {e}")
+        await runner.cleanup()
+        return None
+    logger.info(f"Metrikler: http://{host}:{port}/metrics")
+    return runner
+
+
+def connection_trace_config():
+    """ aiohttp bağlantı kurma süresini connect_seconds'a yazan TraceConfig. """
+    from aiohttp import TraceConfig
+
+    async def on_start(session, context, params):
+        context.connect_started = time.perf_counter()
+
+    async def on_end(session, context, params):
+        connect_seconds.observe(time.perf_counter() - context.connect_started)
+
+    trace_config = TraceConfig()
+    trace_config.on_connection_create_start.append(on_start)
+    trace_config.on_connection_create_end.append(on_end)
+    return trace_config
@@ -0,0 +1,76 @@
+import logging
+
+from pymongo.errors import PyMongoError
+
+from db_manager import processed_collection
+from simhash import HAMMING_THRESHOLD, band_keys, from_int64, hamming
+
+logger = logging.getLogger("AsyncSpider")
+
+
+class NearDuplicateIndex:
+    """
+    Bantlı LSH ile yakın kopya araması. Bu çalışmada görülen sayfalar bellekte, önceki
+    çalışmalarınki processed_sites üzerindeki `simhash_bands` indeksiyle aranır. Bellek
+    indeksi yalnızca henüz Mongo'ya yazılmamış kayıtları kapsamak için tutulur ve
+    `max_entries` aşılınca sıfırlanır.
+    """
+
+    def __init__(self, threshold: int = HAMMING_THRESHOLD, max_entries: int = 200_000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._buckets: dict[int, list[tuple[int, str]]] = {}
+        self._size = 0
+
+    def _find_local(self, fingerprint: int) -> tuple[str, int] | None:
+        for key in band_keys(fingerprint):
+            for candidate, url in self._buckets.get(key, ()):
+                distance = hamming(fingerprint, candidate)
+                if distance <= self.threshold:
+                    return url, distance
+        return None
+
+    def add(self, fingerprint: int, url: str) -> None:
+        if self._size >= self.max_entries:
+            self._buckets.clear()
+            self._size = 0
+        for key in band_keys(fingerprint):
+            self._buckets.setdefault(key, []).append((fingerprint, url))
+        self._size += 1
+
+    async def _find_stored(self, fingerprint: int) -> tuple[str, int] | None:
+        try:
+            # Aday kümesi kesilmez: bantlardan birini paylaşan her kayıt Hamming ile denetlenir
+            cursor = processed_collection.find(
+                {"simhash_bands": {"$in": band_keys(fingerprint)}},
+                {"_id": 0, "url": 1, "simhash": 1},
+            ).batch_size(1000)
+            async for doc in cursor:
+                distance = hamming(fingerprint, from_int64(doc["simhash"]))
+                if distance <= self.threshold:
+                    return doc["url"], distance
+        except PyMongoError:
+            logger.warning("SimHash adayları okunamadı:", exc_info=True)
+        return None
+
+    async def find_canonical(self, url: str, fingerprint: int) -> tuple[str, int] | None:
+        """
+        Yakın kopyası varsa (kanonik URL, Hamming mesafesi) döner; yoksa sayfayı yeni
+        kanonik olarak indekse ekler ve None döner.
+        """
+        match = self._find_local(fingerprint)
+        if match is None:
+            # Eşzamanlı gelen kopyalar da görebilsin diye Mongo beklenmeden eklenir
+            self.add(fingerprint, url)
+            match = await self._find_stored(fingerprint)
+            if match is not None:
+                self._relabel(fingerprint, url, match[0])
+        return match if match is not None and match[0] != url else None
+
+    def _relabel(self, fingerprint: int, url: str, canonical_url: str) -> None:
+        """ Kopya olduğu anlaşılan girdiyi kanonik URL'ye yönlendirir. """
+        for key in band_keys(fingerprint):
+            bucket = self._buckets.get(key, [])
+            for i, (candidate, candidate_url) in enumerate(bucket):
+                if candidate_url == url:
+                    bucket[i] = (candidate, canonical_url)
@@ -0,0 +1,100 @@
+import json
+import logging
+
+from canonical import canonical_host
+
+logger = logging.getLogger("AsyncSpider")
+
+PRIORITY_RULES_PATH = "config/priority_rules.json"
+# queue_urls.priority ve yerel kuyruk kovaları: 0 (en düşük) .. NUM_PRIORITIES - 1
+NUM_PRIORITIES = 16
+
+DEFAULT_TLD_WEIGHTS = {"tr": 5.0, "com": 0.0, "net": 0.0, "org": 0.0, "info": 0.0}
+
+
+class HostYield:
+    """ Host başına indirilen ve Türkçe çıkan sayfa sayıları (verim geçmişi). """
+
+    def __init__(self, prior: tuple[float, float] = (1.0, 2.0)):
+        self.alpha, self.beta = prior
+        self._stats: dict[str, list[int]] = {}  # host -> [indirilen, Türkçe]
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def record(self, host: str, turkish: bool) -> None:
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = [0, 0]
+        stats[0] += 1
+        stats[1] += turkish
+
+    def restore(self, host: str, fetched: int, turkish: int) -> None:
+        self._stats[host] = [fetched, turkish]
+
+    def ratio(self, host: str) -> float:
+        """ Önsel dağılımla yumuşatılmış Türkçe oranı; hiç görülmemiş host için önsel ortalama. """
+        fetched, turkish = self._stats.get(host, (0, 0))
+        return (turkish + self.alpha) / (fetched + self.alpha + self.beta)
+
+    @property
+    def prior_mean(self) -> float:
+        return self.alpha / (self.alpha + self.beta)
+
+
+class PriorityScorer:
+    """
+    Kuyruğa alınan URL'lere 0..NUM_PRIORITIES-1 arası tam sayı öncelik verir:
+    BASE + TLD ağırlığı + ebeveyn sayfanın Türkçe oranı + host'un verim geçmişi -
+    derinlik cezası. Ebeveyn oranı ve host verimi nötr noktalarına (0.5 ve önsel ortalama)
+    göre eklenir; bilinmeyen değerler puanı değiştirmez. TLD ağırlığı en uzun eşleşen
+    sonekten alınır (ör. "com.tr", yoksa "tr").
+    """
+
+    def __init__(self, tld_weights: dict[str, float] = DEFAULT_TLD_WEIGHTS, default_tld_weight: float = -2.0,
+                 base: float = 6.0, parent_ratio_weight: float = 4.0, host_yield_weight: float = 6.0,
+                 depth_penalty: float = 2.0, host_yield: HostYield | None = None):
+        self.tld_weights = {tld.lower().strip("."): weight for tld, weight in tld_weights.items()}
+        self.default_tld_weight = default_tld_weight
+        self.base = base
+        self.parent_ratio_weight = parent_ratio_weight
+        self.host_yield_weight = host_yield_weight
+        self.depth_penalty = depth_penalty
+        self.host_yield = host_yield or HostYield()
+
+    def tld_weight(self, host: str) -> float:
+        labels = host.rsplit(":", 1)[0].split(".")
+        for i in range(1, len(labels)):
+            weight = self.tld_weights.get(".".join(labels[i:]))
+            if weight is not None:
+                return weight
+        return self.default_tld_weight
+
+    def score(self, url: str, depth: int = 0, parent_ratio: float | None = None) -> int:
+        host = canonical_host(url)
+        score = self.base + self.tld_weight(host) - self.depth_penalty * depth
+        if parent_ratio is not None:
+            score += self.parent_ratio_weight * (parent_ratio - 0.5)
+        score += self.host_yield_weight * (self.host_yield.ratio(host) - self.host_yield.prior_mean)
+        return min(NUM_PRIORITIES - 1, max(0, round(score)))
+
+    @classmethod
+    def from_config(cls, path: str = PRIORITY_RULES_PATH) -> "PriorityScorer":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                data.get("TLD_WEIGHTS", DEFAULT_TLD_WEIGHTS),
+                data.get("DEFAULT_TLD_WEIGHT", -2.0),
+                data.get("BASE", 6.0),
+                data.get("PARENT_RATIO_WEIGHT", 4.0),
+                data.get("HOST_YIELD_WEIGHT", 6.0),
+                data.get("DEPTH_PENALTY", 2.0),
+                HostYield(tuple(data.get("HOST_YIELD_PRIOR", (1.0, 2.0)))),
+            )
+        except Exception as e:
+            logger.warning(f"{path} okunamadı, varsayılan öncelik kuralları kullanılıyor: {e}")
+            return cls()
+
+
+priority_scorer = PriorityScorer.from_config()
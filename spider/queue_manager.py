@@ -1,15 +1,63 @@
 import logging
 import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
 from typing import List
 
-from pymongo.errors import PyMongoError, DuplicateKeyError,BulkWriteError
-from db_manager import queue_collection
-from http_client import is_excluded_domain
-import random
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from block_manager import PARK_FULL, PARKED
+from db_manager import (block_expires, filter_unprocessed, load_validators, park_url,
+                        queue_collection, queue_writer)
+from sharding import ShardRing, host_slot
+from pymongo import DESCENDING, DeleteMany, DeleteOne, InsertOne, UpdateOne
+from http_client import filter_excluded, is_excluded_domain
+from frontier import HostFrontier
+from canonical import canonicalizer
+from checkpoint import frontier_checkpoint
+from priority import priority_scorer
+import metrics
+from dns_cache import dns_resolver
+from urllib.parse import urlsplit
 
 logger = logging.getLogger("AsyncSpider")
 
-local_queue = asyncio.Queue(maxsize=2000)
+# Host'lara bölünmüş, hız sınırlı yerel kuyruk (asyncio.Queue arayüzüyle)
+local_queue = HostFrontier(maxsize=2000)
+_refill_lock = asyncio.Lock()
+
+# Yerel kuyruktaki URL'lerin önceki ziyaret doğrulayıcıları (koşullu istek için)
+_validators: dict[str, dict] = {}
+
+# queue_urls kiralama (lease) ayarları: birden fazla spider süreci aynı kuyruğu paylaşabilir
+LEASE_SECONDS = int(os.getenv("SPIDER_LEASE_SECONDS", 900))
+# Checkpoint açıksa sahip kimliği yeniden başlatmalarda korunur; çökmeden önce kiralanan
+# URL'ler kira süresinin dolması beklenmeden geri alınabilir
+LEASE_OWNER = frontier_checkpoint.lease_owner
+
+# Çok süreçli çalışmada bu sürecin sahip olduğu host slotları (None: tüm kuyruk)
+_owned_slots: list[int] | None = None
+_owns_legacy = True
+
+def configure_shard(shard_id: int, num_shards: int) -> None:
+    """ Süreci, tutarlı hash halkasında kendisine düşen host slotlarıyla sınırlar. """
+    global _owned_slots, _owns_legacy
+    if num_shards <= 1:
+        _owned_slots, _owns_legacy = None, True
+        return
+    _owned_slots = ShardRing(num_shards).owned_slots(shard_id)
+    # host_slot alanı olmayan eski kayıtları 0 numaralı shard devralır
+    _owns_legacy = shard_id == 0
+    logger.info(f"Shard {shard_id}/{num_shards}: {len(_owned_slots)} host slotu.")
+
+def _shard_filter() -> dict:
+    if _owned_slots is None:
+        return {}
+    owned = {"host_slot": {"$in": _owned_slots}}
+    if _owns_legacy:
+        return {"$or": [owned, {"host_slot": {"$exists": False}}]}
+    return owned
 '''async def enqueue_url(url: str):
     from http_client import logger  # or simply use the same logger
     if is_excluded_domain(url):
@@ -22,13 +70,24 @@ local_queue = asyncio.Queue(maxsize=2000)
     except PyMongoError as e:
         logger.warning(f"Kuyruğa eklenirken hata: {url} ", exc_info=True)'''
         
+def _queue_doc(url: str, depth: int, parent_ratio: float | None = None) -> dict:
+    return {
+        "url": url,
+        "depth": depth,
+        "host_slot": host_slot(url),
+        "priority": priority_scorer.score(url, depth, parent_ratio),
+    }
+
 async def enqueue_url(url_depth: tuple[str, int]):
     url, depth = url_depth
+    url = canonicalizer.canonicalize(url)
+    if url is None:
+        return
     if is_excluded_domain(url):
         logger.debug(f"Domain engellendi: {url}")
         return
     try:
-        await queue_collection.insert_one({"url": url, "depth": depth})
+        await queue_collection.insert_one(_queue_doc(url, depth))
     except DuplicateKeyError:
         pass
     except PyMongoError as e:
@@ -51,19 +110,23 @@ async def enqueue_url(url_depth: tuple[str, int]):
     except PyMongoError as e:
         logger.warning(f"Kuyruğa toplu eklenirken hata:", exc_info=True)'''
         
-async def enqueue_url_batch(url_depth_list: List[tuple[str, int]]):
-    valid_docs = []
+async def enqueue_url_batch(url_depth_list: List[tuple[str, int]], parent_ratio: float | None = None):
+    """
+    URL'leri öncelik puanıyla birlikte toplu kuyruğa alır. `parent_ratio`, linklerin
+    bulunduğu sayfanın Türkçe oranıdır (bilinmiyorsa None).
+    """
+    # Aynı sayfanın varyantları tek kuyruk kaydına iner; ilk gelen derinlik geçerlidir
+    canonical: dict[str, int] = {}
     for url, depth in url_depth_list:
-        if not is_excluded_domain(url):
-            valid_docs.append({"url": url, "depth": depth})
-    if not valid_docs:
-        return
-    try:
-        await queue_collection.insert_many(valid_docs, ordered=False)
-    except BulkWriteError:
-        pass
-    except PyMongoError as e:
-        logger.warning("Kuyruğa toplu eklenirken hata:", exc_info=True)
+        url = canonicalizer.canonicalize(url)
+        if url is not None:
+            canonical.setdefault(url, depth)
+    allowed = set(filter_excluded(canonical))
+    # Duplicate key hataları toplu yazıcıda yok sayılır
+    await queue_writer.add_many(
+        InsertOne(_queue_doc(url, depth, parent_ratio))
+        for url, depth in canonical.items() if url in allowed
+    )
 
 
 '''async def dequeue_url_from_db_batch(batch_size: int = 50) -> List[str]:
@@ -88,25 +151,201 @@ async def refill_local_queue(batch_size: int = 200) -> None:
                 if local_queue.full():
                     break'''
                     
-async def dequeue_url_from_db_batch(batch_size: int = 50) -> List[tuple[str, int]]:
+def _hostname(url: str) -> str | None:
+    try:
+        return urlsplit(url).hostname
+    except ValueError:
+        return None
+
+def _lease_available(now: datetime) -> dict:
+    """ Hiç kiralanmamış ya da kira süresi dolmuş kayıtlar. """
+    return {"lease_expires": {"$not": {"$gt": now}}, **_shard_filter()}
+
+async def dequeue_url_from_db_batch(batch_size: int = 50) -> List[tuple[str, int, int]]:
+    """
+    URL'leri silmeden, en yüksek öncelikliden başlayarak kiralar: adaylar seçilir, tek
+    bir update_many ile bu sürece ve bu çağrıya özgü claim ile işaretlenir, sonra yalnızca
+    gerçekten kiralananlar (url, depth, priority) olarak okunur. Başka süreçlerin aynı
+    anda kiraladıkları filtre sayesinde atlanır.
+    """
     url_depths = []
+    now = datetime.now()
     try:
-        cursor = queue_collection.find({}).limit(batch_size)
-        async for doc in cursor:
-            depth = doc.get("depth", 0)
-            url_depths.append((doc["url"], depth))
-        if url_depths:
-            await queue_collection.delete_many({"url": {"$in": [u for u, _ in url_depths]}})
+        candidate_ids = [
+            doc["_id"]
+            async for doc in queue_collection.find(_lease_available(now), {"_id": 1})
+                                             .sort("priority", DESCENDING).limit(batch_size)
+        ]
+        if not candidate_ids:
+            return url_depths
+        claim = uuid.uuid4().hex
+        await queue_collection.update_many(
+            {"_id": {"$in": candidate_ids}, **_lease_available(now)},
+            {"$set": {
+                "lease_owner": LEASE_OWNER,
+                "lease_claim": claim,
+                "lease_expires": now + timedelta(seconds=LEASE_SECONDS),
+            }},
+        )
+        async for doc in queue_collection.find({"lease_claim": claim}, {"url": 1, "depth": 1, "priority": 1}):
+            url_depths.append((doc["url"], doc.get("depth", 0), doc.get("priority", 0)))
     except PyMongoError as e:
         logger.warning("Kuyruktan batch çekilirken hata:", exc_info=True)
     return url_depths
 
+async def ack_url(url: str) -> None:
+    """ İşlenen URL'nin kirasını kapatır (kayıt queue_urls'tan toplu yazıcıyla silinir). """
+    frontier_checkpoint.done(url)
+    await queue_writer.add(DeleteOne({"url": url, "lease_owner": LEASE_OWNER}))
+
+async def remove_url(url: str) -> None:
+    """ URL'yi yerel kuyrukta O(1) iptal eder ve DB kuyruğundan silinmesini tampona bırakır. """
+    local_queue.discard(url)
+    _validators.pop(url, None)
+    frontier_checkpoint.done(url)
+    await queue_writer.add(DeleteMany({"url": url}))
+
+async def hold_blocked(url: str, depth: int) -> bool:
+    """
+    Kiralanmış URL'nin host'u engelliyse URL'yi bekletir ve True döner: park edildiyse
+    kira kapatılır; host'un park kotası dolduysa kayıt queue_urls'ta kalır ve kirası engel
+    bitene kadar uzatılır. True dönen URL için ayrıca ack_url çağrılmamalıdır.
+    """
+    parked = await park_url(url, depth)
+    if parked == PARKED:
+        await ack_url(url)
+    elif parked == PARK_FULL:
+        await defer_url(url, block_expires(url))
+    return bool(parked)
+
+async def defer_url(url: str, until: float) -> None:
+    """ Kiralanmış URL'yi queue_urls'ta bırakır; kirası `until` (epoch) zamanına kadar uzatılır. """
+    _validators.pop(url, None)
+    frontier_checkpoint.done(url)
+    await queue_writer.add(UpdateOne(
+        {"url": url, "lease_owner": LEASE_OWNER},
+        {"$set": {"lease_expires": datetime.fromtimestamp(until)}},
+    ))
+
+async def release_urls(urls: List[str]) -> None:
+    """ İşlenmeyecek URL'lerin kirasını bırakır; başka süreçler hemen alabilir. """
+    if not urls:
+        return
+    for url in urls:
+        _validators.pop(url, None)
+        frontier_checkpoint.done(url)
+    try:
+        await queue_collection.update_many(
+            {"url": {"$in": urls}, "lease_owner": LEASE_OWNER},
+            {"$unset": {"lease_owner": "", "lease_claim": "", "lease_expires": ""}},
+        )
+    except PyMongoError:
+        logger.warning("Kiralar bırakılırken hata:", exc_info=True)
+
+async def renew_leases(interval_seconds: int = LEASE_SECONDS // 3) -> None:
+    """ Yerel kuyrukta bekleyen URL'lerin kiralarını süresi dolmadan uzatır. """
+    try:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            urls = list(local_queue.urls())
+            if not urls:
+                continue
+            try:
+                await queue_collection.update_many(
+                    {"url": {"$in": urls}, "lease_owner": LEASE_OWNER},
+                    {"$set": {"lease_expires": datetime.now() + timedelta(seconds=LEASE_SECONDS)}},
+                )
+            except PyMongoError:
+                logger.warning("Kiralar uzatılırken hata:", exc_info=True)
+    except asyncio.CancelledError:
+        pass
+
+def pop_validators(url: str, depth: int) -> dict | None:
+    """
+    URL'nin önceki ziyaret doğrulayıcılarını döner. Sayfa şimdi daha sığ bir derinlikte
+    geldiyse linkleri yeniden açılmalıdır; bu durumda koşulsuz indirme için None döner.
+    """
+    validators = _validators.pop(url, None)
+    if validators is None or depth < validators.get("depth", 0):
+        return None
+    return validators
+
 async def refill_local_queue(batch_size: int = 400) -> None:
-    while not local_queue.full():
-        batch = await dequeue_url_from_db_batch(batch_size=batch_size)
-        if not batch:
-            break
-        for url_depth in batch:
-            await local_queue.put(url_depth)
-            if local_queue.full():
+    if _refill_lock.locked():
+        return  # Başka bir worker zaten dolduruyor
+    async with _refill_lock:
+        started = time.perf_counter()
+        overflow = []
+        while not local_queue.full() and not local_queue.has_ready():
+            batch = await dequeue_url_from_db_batch(batch_size=batch_size)
+            if not batch:
+                break
+            metrics.refill_urls_total.inc(len(batch))
+            # Başka bir shard'ın işlediği URL'ler kuyruğa girmiş olabilir; sahibi burada eler
+            fresh = set(await filter_unprocessed([url for url, _, _ in batch]))
+            for url, depth, _ in batch:
+                if url not in fresh:
+                    await ack_url(url)
+                elif await hold_blocked(url, depth):
+                    # Engelli host'un URL'si yerel kuyruğu işgal etmez; engel bitince geri gelir
+                    fresh.discard(url)
+            batch = [entry for entry in batch if entry[0] in fresh]
+            # Birazdan istek atılacak host'ların DNS kayıtları arka planda ısıtılır
+            dns_resolver.prefetch(_hostname(url) for url, _, _ in batch)
+            # Daha önce indirilmiş sayfaların doğrulayıcıları tek sorguda yüklenir
+            _validators.update(await load_validators([url for url, _, _ in batch]))
+            for url, depth, priority in batch:
+                # Kotası dolan host'ların URL'lerinin kirası bırakılır
+                if local_queue.full() or local_queue.host_full(url):
+                    overflow.append(url)
+                else:
+                    local_queue.put_nowait((url, depth), priority)
+                    frontier_checkpoint.queued(url, depth, priority)
+            if overflow:
                 break
+        if overflow:
+            await release_urls(overflow)
+        local_queue.forget_idle_hosts()
+        metrics.refill_seconds.observe(time.perf_counter() - started)
+
+async def restore_local_queue() -> int:
+    """
+    Önceki çalışmada kiralanıp işlenmeden kalan URL'leri checkpoint'ten yerel kuyruğa
+    geri alır. Kira hâlâ bu sahipteyse ya da süresi dolmuşsa yeniden alınır; başka bir
+    sürece geçmiş ya da bu arada işlenmiş URL'ler bırakılır.
+    """
+    pending = dict(frontier_checkpoint.pending)
+    if not pending:
+        return 0
+    urls = list(pending)
+    now = datetime.now()
+    try:
+        await queue_collection.update_many(
+            {"url": {"$in": urls},
+             "$or": [{"lease_owner": LEASE_OWNER}, {"lease_expires": {"$not": {"$gt": now}}}]},
+            {"$set": {"lease_owner": LEASE_OWNER, "lease_expires": now + timedelta(seconds=LEASE_SECONDS)}},
+        )
+        owned = [
+            doc["url"]
+            async for doc in queue_collection.find({"url": {"$in": urls}, "lease_owner": LEASE_OWNER}, {"url": 1})
+        ]
+    except PyMongoError:
+        logger.warning("Checkpoint'teki kiralar geri alınamadı:", exc_info=True)
+        return 0
+    fresh = set(await filter_unprocessed(owned))
+    for url in owned:
+        if url not in fresh:
+            await ack_url(url)
+    _validators.update(await load_validators(list(fresh)))
+    restored = 0
+    for url in urls:
+        if url in fresh and not local_queue.full():
+            depth, priority = pending[url]
+            local_queue.put_nowait((url, depth), priority)
+            restored += 1
+        elif url in fresh:
+            await release_urls([url])
+        else:
+            frontier_checkpoint.done(url)
+    logger.info(f"Checkpoint'ten {restored} URL yerel kuyruğa geri alındı ({len(urls) - restored} bırakıldı).")
+    return restored
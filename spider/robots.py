@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from aiohttp import ClientError, ClientSession
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from db_manager import robots_collection, robots_writer
+from http_client import get_random_user_agent, read_body
+
+logger = logging.getLogger("AsyncSpider")
+
+ROBOTS_USER_AGENT = "HopeSearch"
+ROBOTS_TTL = 24 * 3600          # başarılı robots.txt kayıtları (sn)
+ROBOTS_ERROR_TTL = 600          # 5xx / ağ hatası sonrası (sn)
+ROBOTS_MAX_BYTES = 500 * 1024   # RFC 9309: en az 500 KiB işlenmeli
+
+
+def origin_of(url: str) -> str | None:
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if not parts.scheme or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+
+class _Rules:
+    """
+    Bir origin için ayrıştırılmış robots.txt. `parser` None ise her şeye izin verilir.
+    `temporary` kurallar sunucu hatasından türetilmiştir (geçici tam yasak).
+    """
+
+    __slots__ = ("parser", "disallow_all", "crawl_delay", "expires", "temporary")
+
+    def __init__(self, body: str | None, disallow_all: bool, expires: float, temporary: bool = False):
+        self.parser = None
+        self.disallow_all = disallow_all
+        self.crawl_delay = None
+        self.expires = expires
+        self.temporary = temporary
+        if body:
+            self.parser = RobotFileParser()
+            self.parser.parse(body.splitlines())
+            delay = self.parser.crawl_delay(ROBOTS_USER_AGENT)
+            self.crawl_delay = float(delay) if delay else None
+
+    def allows(self, url: str) -> bool:
+        if self.disallow_all:
+            return False
+        if self.parser is None:
+            return True
+        return self.parser.can_fetch(ROBOTS_USER_AGENT, url)
+
+
+class RobotsCache:
+    """
+    Host başına robots.txt önbelleği: bellekte ayrıştırılmış kurallar, Mongo'da
+    (robots_cache) ham metin ve alınma zamanı saklanır. Kayıt süresi dolunca yeniden
+    indirilir. Crawl-delay değeri `on_crawl_delay(host, saniye)` ile zamanlayıcıya iletilir.
+    """
+
+    def __init__(self, ttl: float = ROBOTS_TTL, on_crawl_delay: Callable[[str, float], None] | None = None):
+        self.ttl = ttl
+        self.on_crawl_delay = on_crawl_delay
+        self._rules: dict[str, _Rules] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _cached(self, origin: str) -> _Rules | None:
+        rules = self._rules.get(origin)
+        if rules is not None and rules.expires < time.monotonic():
+            del self._rules[origin]
+            return None
+        return rules
+
+    def filter_allowed(self, urls: list[str]) -> list[str]:
+        """
+        Kuralları bellekte olan host'lar için izin verilmeyen URL'leri atar; kuralı henüz
+        bilinmeyen ya da geçici (sunucu hatası) kuralı olan host'ların URL'leri geçer ve
+        fetch öncesinde `allowed` ile kontrol edilir.
+        """
+        allowed = []
+        for url in urls:
+            origin = origin_of(url)
+            rules = self._cached(origin) if origin else None
+            if rules is None or rules.temporary or rules.allows(url):
+                allowed.append(url)
+        return allowed
+
+    def retry_at(self, url: str) -> float | None:
+        """ Host'un kuralı sunucu hatasından türetilmişse yeniden denenebileceği zaman (epoch). """
+        origin = origin_of(url)
+        rules = self._cached(origin) if origin else None
+        if rules is None or not rules.temporary:
+            return None
+        return time.time() + rules.expires - time.monotonic()
+
+    async def allowed(self, session: ClientSession, url: str) -> bool:
+        origin = origin_of(url)
+        if origin is None:
+            return True
+        rules = self._cached(origin)
+        if rules is None:
+            future = self._inflight.get(origin)
+            if future is None:
+                future = asyncio.ensure_future(self._load(session, origin))
+                self._inflight[origin] = future
+                future.add_done_callback(lambda _: self._inflight.pop(origin, None))
+            rules = await asyncio.shield(future)
+        if rules.crawl_delay and self.on_crawl_delay is not None:
+            self.on_crawl_delay(urlsplit(origin).netloc, rules.crawl_delay)
+        return rules.allows(url)
+
+    async def _load(self, session: ClientSession, origin: str) -> _Rules:
+        rules = await self._load_from_db(origin)
+        if rules is None:
+            rules = await self._fetch(session, origin)
+        self._rules[origin] = rules
+        return rules
+
+    async def _load_from_db(self, origin: str) -> _Rules | None:
+        try:
+            doc = await robots_collection.find_one({"host": origin})
+        except PyMongoError:
+            logger.warning(f"robots_cache okunamadı: {origin}", exc_info=True)
+            return None
+        if doc is None:
+            return None
+        age = (datetime.now() - doc["fetched_at"]).total_seconds()
+        ttl = self.ttl if doc.get("status", 200) < 500 else ROBOTS_ERROR_TTL
+        if age >= ttl:
+            return None
+        return _Rules(doc.get("body"), doc.get("disallow_all", False), time.monotonic() + ttl - age,
+                      temporary=doc.get("status", 200) >= 500)
+
+    async def _fetch(self, session: ClientSession, origin: str) -> _Rules:
+        body = None
+        disallow_all = False
+        ttl = self.ttl
+        status = None
+        try:
+            headers = {"User-Agent": get_random_user_agent()}
+            async with session.get(origin + "/robots.txt", headers=headers, timeout=10, ssl=False) as resp:
+                status = resp.status
+                if status == 200:
+                    # content.read(n) yalnızca tampondakini döner; gövde sınır ya da EOF'a kadar okunur
+                    raw, _ = await read_body(resp, ROBOTS_MAX_BYTES)
+                    body = raw.decode("utf-8", errors="replace")
+                elif status >= 500:
+                    # RFC 9309: sunucu hatasında site geçici olarak tamamen yasak sayılır
+                    disallow_all = True
+                    ttl = ROBOTS_ERROR_TTL
+                # 4xx: robots.txt yok, her şeye izin
+        except (ClientError, asyncio.TimeoutError, UnicodeError) as e:
+            logger.debug(f"[ROBOTS] {origin} robots.txt alınamadı: {type(e).__name__}")
+            ttl = ROBOTS_ERROR_TTL
+            status = 599
+
+        await robots_writer.add(UpdateOne(
+            {"host": origin},
+            {"$set": {
+                "body": body,
+                "status": status,
+                "disallow_all": disallow_all,
+                "fetched_at": datetime.now(),
+            }},
+            upsert=True,
+        ))
+        return _Rules(body, disallow_all, time.monotonic() + ttl, temporary=status is not None and status >= 500)
@@ -0,0 +1,22 @@
+import logging
+
+logger = logging.getLogger("AsyncSpider")
+
+
+def get_initial_sites(filepath: str, count: int = 10) -> list[str]:
+    sites = []
+    try:
+        with open(filepath, 'r+', encoding='utf-8') as file:
+            for _ in range(count):
+                line = file.readline()
+                if not line:
+                    break
+                sites.append(line.strip())
+            remaining = file.readlines()
+            file.seek(0)
+            file.writelines(remaining)
+            file.truncate()
+        logger.info(f"{len(sites)} adet site okundu.")
+    except Exception as e:
+        logger.error(f"[FILE-ERROR]", exc_info=True)
+    return sites
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+
+logger = logging.getLogger("AsyncSpider")
+
+SEEN_BACKEND = os.getenv("SPIDER_SEEN_BACKEND", "bloom")
+SEEN_PATH = os.getenv("SPIDER_SEEN_PATH", "data/seen")
+
+_HEADER = struct.Struct("<8sQQII")  # magic, capacity, num_bits, num_hashes, count
+_MAGIC = b"HSBLOOM1"
+
+
+def url_hash64(url: str) -> int:
+    """ URL'nin 64 bitlik blake2b özeti. """
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MemorySeenSet:
+    """ Eski davranış: URL'leri birebir tutan Python set'i. Yanlış pozitif üretmez. """
+
+    exact = True
+
+    def __init__(self):
+        self._urls = set()
+
+    def add(self, url: str) -> None:
+        self._urls.add(url)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    @property
+    def meta(self) -> dict:
+        return {}
+
+    def save_meta(self, meta: dict) -> None:
+        pass
+
+    def clear(self) -> None:
+        self._urls.clear()
+
+    def close(self) -> None:
+        pass
+
+
+class _BloomSlice:
+    """ Tek bir mmap dosyasına yazılan sabit kapasiteli Bloom filtresi. """
+
+    def __init__(self, path: str, capacity: int = 0, error_rate: float = 0.0):
+        if not os.path.exists(path):
+            num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, capacity, num_bits, num_hashes, 0))
+                f.truncate(_HEADER.size + (num_bits + 7) // 8)
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        magic, self.capacity, self.num_bits, self.num_hashes, self.count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"Geçersiz Bloom dosyası: {path}")
+
+    def _positions(self, h: int):
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, h: int) -> bool:
+        mm = self._mm
+        offset = _HEADER.size
+        for pos in self._positions(h):
+            if not mm[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, h: int) -> None:
+        mm = self._mm
+        offset = _HEADER.size
+        for pos in self._positions(h):
+            mm[offset + (pos >> 3)] |= 1 << (pos & 7)
+        self.count += 1
+        struct.pack_into("<I", mm, _HEADER.size - 4, self.count)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def close(self) -> None:
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+
+
+class BloomSeenSet:
+    """
+    64 bitlik URL özetleri üzerinde ölçeklenebilir Bloom filtresi. Her dilim ayrı
+    bir mmap dosyasıdır; dolan dilimin ardından daha büyük kapasiteli ve daha sıkı
+    hata oranlı yeni bir dilim açılır. Yeniden başlatmada dosyalar sadece map edilir.
+    `in` kontrolü olasılıksaldır; kesin karar için Mongo'ya bakılmalıdır. Dosyaların
+    hangi veritabanından ve hangi kayda kadar doldurulduğu meta.json'da tutulur.
+    """
+
+    exact = False
+
+    def __init__(self, directory: str = SEEN_PATH, initial_capacity: int = 1_000_000,
+                 error_rate: float = 0.001, growth: int = 2, tightening: float = 0.5):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self._slices: list[_BloomSlice] = []
+        while os.path.exists(self._slice_path(len(self._slices))):
+            self._slices.append(_BloomSlice(self._slice_path(len(self._slices))))
+        if self._slices:
+            logger.info(f"Bloom seen-set yüklendi: {len(self)} URL, {len(self._slices)} dilim ({directory}).")
+
+    def _slice_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"slice_{index:03d}.bloom")
+
+    @property
+    def meta(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_meta(self, meta: dict) -> None:
+        path = os.path.join(self.directory, "meta.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    def clear(self) -> None:
+        """ Tüm dilimleri ve meta bilgisini siler; Bloom filtresinden tek tek silme yapılamaz. """
+        self.close()
+        index = 0
+        while os.path.exists(self._slice_path(index)):
+            os.remove(self._slice_path(index))
+            index += 1
+        if os.path.exists(os.path.join(self.directory, "meta.json")):
+            os.remove(os.path.join(self.directory, "meta.json"))
+
+    def _new_slice(self) -> _BloomSlice:
+        index = len(self._slices)
+        bloom = _BloomSlice(
+            self._slice_path(index),
+            capacity=self.initial_capacity * self.growth ** index,
+            error_rate=self.error_rate * (1 - self.tightening) * self.tightening ** index,
+        )
+        self._slices.append(bloom)
+        return bloom
+
+    def _contains_hash(self, h: int) -> bool:
+        return any(h in bloom for bloom in self._slices)
+
+    def add(self, url: str) -> None:
+        h = url_hash64(url)
+        if self._contains_hash(h):
+            return
+        bloom = self._slices[-1] if self._slices and not self._slices[-1].full else self._new_slice()
+        bloom.add(h)
+
+    def __contains__(self, url: str) -> bool:
+        return self._contains_hash(url_hash64(url))
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self._slices)
+
+    def close(self) -> None:
+        for bloom in self._slices:
+            bloom.close()
+        self._slices = []
+
+
+def create_seen_set(backend: str = SEEN_BACKEND, path: str = SEEN_PATH):
+    """ SPIDER_SEEN_BACKEND: "bloom" (varsayılan, mmap dosyası) ya da "memory". """
+    if backend == "memory":
+        return MemorySeenSet()
+    if backend == "bloom":
+        return BloomSeenSet(path)
+    raise ValueError(f"Bilinmeyen seen-set backend'i: {backend}")
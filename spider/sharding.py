@@ -0,0 +1,40 @@
+import bisect
+import hashlib
+
+from db_manager import get_domain
+
+# Host'lar sabit sayıda slota dağıtılır; slotlar da tutarlı hash halkasıyla shard'lara atanır.
+# Shard sayısı değiştiğinde yalnızca halkada yer değiştiren slotların sahibi değişir.
+HOST_SLOTS = 4096
+VNODES_PER_SHARD = 64
+
+
+def _hash32(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+def host_slot(url: str) -> int:
+    """ URL'nin host'una ait slot (0..HOST_SLOTS-1); queue_urls'ta `host_slot` alanı olarak tutulur. """
+    return _hash32(get_domain(url)) % HOST_SLOTS
+
+
+class ShardRing:
+    """ Shard başına VNODES_PER_SHARD sanal düğümlü tutarlı hash halkası. """
+
+    def __init__(self, num_shards: int, vnodes: int = VNODES_PER_SHARD):
+        self.num_shards = num_shards
+        points = sorted(
+            (_hash32(f"shard-{shard}-{vnode}"), shard)
+            for shard in range(num_shards)
+            for vnode in range(vnodes)
+        )
+        self._keys = [key for key, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for_slot(self, slot: int) -> int:
+        index = bisect.bisect(self._keys, _hash32(f"slot-{slot}")) % len(self._keys)
+        return self._shards[index]
+
+    def owned_slots(self, shard_id: int) -> list[int]:
+        return [slot for slot in range(HOST_SLOTS) if self.shard_for_slot(slot) == shard_id]
+
@@ -0,0 +1,64 @@
+import hashlib
+import re
+from collections import Counter
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+MIN_TOKENS = 30               # daha kısa metinlerde parmak izi güvenilir değil
+SIMHASH_MAX_CHARS = 20000
+# 64 bit 4 banda bölünür: Hamming mesafesi <= 3 olan iki parmak izi en az bir bantta
+# birebir eşleşir (güvercin yuvası), bu yüzden aday araması bant eşitliğiyle yapılır.
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+HAMMING_THRESHOLD = 3
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def _hash64(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash64(text: str) -> int | None:
+    """ Kelime 3-shingle'larından 64 bitlik SimHash; metin çok kısaysa None. """
+    tokens = _TOKEN_RE.findall(text[:SIMHASH_MAX_CHARS].lower())
+    if len(tokens) < MIN_TOKENS:
+        return None
+    features = Counter(
+        " ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    )
+    vector = [0] * SIMHASH_BITS
+    for feature, weight in features.items():
+        h = _hash64(feature)
+        for bit in range(SIMHASH_BITS):
+            if h >> bit & 1:
+                vector[bit] += weight
+            else:
+                vector[bit] -= weight
+    fingerprint = 0
+    for bit, value in enumerate(vector):
+        if value > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def band_keys(fingerprint: int) -> list[int]:
+    """ LSH bant anahtarları: bant numarası üst bitlerde, bant değeri alt bitlerde. """
+    return [
+        band << BAND_BITS | (fingerprint >> (band * BAND_BITS)) & _BAND_MASK
+        for band in range(BANDS)
+    ]
+
+
+def to_int64(fingerprint: int) -> int:
+    """ BSON int64'e sığması için işaretli gösterime çevirir. """
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def from_int64(value: int) -> int:
+    return value & ((1 << 64) - 1)
@@ -0,0 +1,90 @@
+import json
+import logging
+import math
+import re
+
+logger = logging.getLogger("AsyncSpider")
+
+TURKISH_PROFILE_PATH = "config/turkish_ngrams.json"
+MIN_WORDS = 20               # langdetect yolundaki alt sınırla aynı
+MIN_SENTENCE_CHARS = 11      # langdetect yolunda daha kısa parçalar sayılmazdı
+EARLY_STOP_SENTENCES = 4     # erken karar için en az bu kadar cümle sınıflanmalı
+# ğ, ş, ı ve İ Türkçe dışındaki Latin alfabeli dillerde neredeyse hiç geçmez
+TURKISH_LETTERS = frozenset("ğşı")
+TURKISH_LETTER_BONUS = 2.0
+# Türk alfabesinde olmayan, yakın Türk dillerine özgü harfler (Azerbaycanca ə, Türkmence ä/ň/ý/ž);
+# bunları içeren cümle n-gram puanına bakılmadan Türkçe sayılmaz
+NON_TURKISH_LETTERS = frozenset("əäňýž")
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def normalize_case(text: str) -> str:
+    return text.replace("İ", "i").lower()
+
+
+class TurkishDetector:
+    """
+    Karakter 2/3-gram log olasılık oranlarıyla Türkçe tespiti (profil: build_turkish_profile.py).
+    Her kelime, n-gram oranlarının toplamı ve Türkçeye özgü harf bonusuyla puanlanır; kelime
+    puanlarının toplamı pozitif olan cümle Türkçe sayılır. Sonuç, önceki langdetect yolundaki
+    gibi Türkçe sınıflanan cümlelerin oranıdır. Karar eşikten yeterince uzaklaştığında
+    metnin geri kalanı okunmaz. Tamamen deterministiktir.
+    """
+
+    def __init__(self, log_ratios: dict[str, float], ngram_sizes=(2, 3)):
+        self.log_ratios = log_ratios
+        self.ngram_sizes = tuple(ngram_sizes)
+
+    @classmethod
+    def from_config(cls, path: str = TURKISH_PROFILE_PATH) -> "TurkishDetector":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data.get("LOG_RATIOS", {}), data.get("NGRAM_SIZES", (2, 3)))
+        except Exception as e:
+            logger.warning(f"{path} okunamadı: {e}")
+            return cls({})
+
+    def word_score(self, word: str) -> float:
+        padded = f" {word} "
+        ratios = self.log_ratios
+        score = 0.0
+        for size in self.ngram_sizes:
+            for i in range(len(padded) - size + 1):
+                score += ratios.get(padded[i:i + size], 0.0)
+        for ch in word:
+            if ch in TURKISH_LETTERS:
+                score += TURKISH_LETTER_BONUS
+        return score
+
+    def is_turkish_sentence(self, sentence: str) -> bool:
+        """ `sentence` normalize_case'ten geçmiş olmalıdır. """
+        if not NON_TURKISH_LETTERS.isdisjoint(sentence):
+            return False
+        return sum(self.word_score(word) for word in _WORD_RE.findall(sentence)) > 0
+
+    def turkish_ratio(self, text: str, threshold: float = 0.3) -> float:
+        """
+        Türkçe sınıflanan cümlelerin oranı (cümleler langdetect yolundaki gibi ". " ile
+        ayrılır). `threshold` yalnızca erken durma içindir: oran, eşiğin güven aralığının
+        dışına çıktığında kalan cümleler sınıflanmaz.
+        """
+        if len(text.split()) < MIN_WORDS:
+            return 0.0
+        turkish = 0
+        checked = 0
+        for sentence in normalize_case(text).split(". "):
+            if len(sentence) < MIN_SENTENCE_CHARS:
+                continue
+            checked += 1
+            if self.is_turkish_sentence(sentence):
+                turkish += 1
+            if checked >= EARLY_STOP_SENTENCES:
+                ratio = turkish / checked
+                if abs(ratio - threshold) > 1.25 / math.sqrt(checked):
+                    return ratio
+        return turkish / checked if checked else 0.0
+
+
+turkish_detector = TurkishDetector.from_config()